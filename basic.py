@@ -1,40 +1,125 @@
+from contextlib import nullcontext
+
+from cache import Cache
+from compiler import Compiler
+from error import InvalidSyntaxError, RTError
 from interpreter import Number, Context, SymbolTable, Interpreter, BuiltInFunction
-from lexer import Lexer
+from lexer import Lexer, Scanner
+from optimizer import Optimizer
 from parser import Parser
+from tracing import phase
+from vm import VM, MAX_DEPTH
+
+# The names every engine starts out with, each engine changes a copy
+builtin_symbol_table = SymbolTable()
+builtin_symbol_table.set("null", Number.null)
+builtin_symbol_table.set("TRUE", Number.true)
+builtin_symbol_table.set("FALSE", Number.false)
+builtin_symbol_table.set("PRINT", BuiltInFunction("print"))
+builtin_symbol_table.set("INPUT", BuiltInFunction("input"))
+builtin_symbol_table.set("CLEAR", BuiltInFunction("clear"))
+builtin_symbol_table.set("CLS", BuiltInFunction("clear"))
+builtin_symbol_table.set("IS_NUM", BuiltInFunction("is_number"))
+builtin_symbol_table.set("IS_STR", BuiltInFunction("is_string"))
+builtin_symbol_table.set("IS_LIST", BuiltInFunction("is_list"))
+builtin_symbol_table.set("IS_FUN", BuiltInFunction("is_function"))
+builtin_symbol_table.set("APPEND", BuiltInFunction("append"))
+builtin_symbol_table.set("POP", BuiltInFunction("pop"))
+builtin_symbol_table.set("EXTEND", BuiltInFunction("extend"))
+builtin_symbol_table.set("VEC_ADD", BuiltInFunction("vec_add"))
+builtin_symbol_table.set("VEC_MUL", BuiltInFunction("vec_mul"))
+builtin_symbol_table.set("DOT", BuiltInFunction("dot"))
+builtin_symbol_table.set("SUM", BuiltInFunction("sum"))
+builtin_symbol_table.set("MIN", BuiltInFunction("min"))
+builtin_symbol_table.set("MAX", BuiltInFunction("max"))
+builtin_symbol_table.set("MEMO", BuiltInFunction("memo"))
+builtin_symbol_table.set("MEMO_INFO", BuiltInFunction("memo_info"))
+
+
+class Engine:
+    # One interpreter with its own globals and settings. Engines share
+    # nothing a program changes, so each thread can run its own, and one is
+    # cheap to make, its globals start as a copy of builtin_symbol_table.
+    # Builtins only hold their name, every engine has the same ones.
+    def __init__(self, mode='interpret', scan=True, cache_dir=None, optimize=1, max_depth=MAX_DEPTH,
+                 global_symbol_table=None):
+        self.mode = mode
+        self.scan = scan
+        self.cache = Cache(cache_dir) if cache_dir else None
+        self.optimize = optimize
+        self.max_depth = max_depth
+        if global_symbol_table is None:
+            global_symbol_table = builtin_symbol_table.clone()
+        self.global_symbol_table = global_symbol_table
+
+    def reset(self):
+        self.global_symbol_table = builtin_symbol_table.clone()
+
+    def run(self, filename, text, tracer=None, profiler=None, budget=None):
+        if profiler and tracer and tracer.visits:
+            # Each brings its own interpreter
+            raise ValueError("A run cannot count visits and be profiled at once")
+        if self.mode == 'vm' and tracer and tracer.visits:
+            raise ValueError("Only the tree walker can count visits, not the VM")
+        mode = self.mode
+        cache = self.cache
+        program = None
+        if cache:
+            kind = 'code' if mode == 'vm' else 'ast'
+            key = cache.key(filename, text, f'{kind}-O{self.optimize}')
+            program = cache.load(key)
+
+        if program is None:
+            with phase(tracer, 'lex'):
+                lexer = Scanner(filename, text) if self.scan else Lexer(filename, text)
+                tokens, error = lexer.make_tokens()
+
+            if error:
+                return None, error
+            parser = Parser(tokens)
+
+            with phase(tracer, 'parse'):
+                try:
+                    ast = parser.parse()
+                except InvalidSyntaxError as error:
+                    return None, error
+            if tracer:
+                tracer.count(tokens, ast)
+            if self.optimize:
+                # Folding constants allocates too, a fold over budget is left to fail at runtime
+                with phase(tracer, 'optimize'), budget.running() if budget else nullcontext():
+                    ast = Optimizer().optimize(ast)
+            if mode == 'vm':
+                with phase(tracer, 'compile'):
+                    program = Compiler().compile(ast)
+            else:
+                program = ast
+            if cache:
+                cache.store(key, program)
+
+        context = Context('<program>')
+        context.symbol_table = self.global_symbol_table
+        try:
+            with phase(tracer, 'execute'), profiler.running(mode) if profiler else nullcontext(), \
+                    budget.running() if budget else nullcontext():
+                if mode == 'vm':
+                    result = VM(max_depth=self.max_depth).run(program, context)
+                else:
+                    if profiler:
+                        interpreter = profiler.interpreter()
+                    else:
+                        interpreter = tracer.interpreter() if tracer else Interpreter()
+                    result = interpreter.run(program, context)
+        except RTError as error:
+            return None, error
+        return result, None
+
+
+global_symbol_table = builtin_symbol_table.clone()
+
 
-global_symbol_table = SymbolTable()
-global_symbol_table.set("null", Number.null)
-global_symbol_table.set("TRUE", Number.true)
-global_symbol_table.set("FALSE", Number.false)
-global_symbol_table.set("PRINT", BuiltInFunction.print)
-global_symbol_table.set("INPUT", BuiltInFunction.input)
-global_symbol_table.set("CLEAR", BuiltInFunction.clear)
-global_symbol_table.set("CLS", BuiltInFunction.clear)
-global_symbol_table.set("IS_NUM", BuiltInFunction.is_number)
-global_symbol_table.set("IS_STR", BuiltInFunction.is_string)
-global_symbol_table.set("IS_LIST", BuiltInFunction.is_list)
-global_symbol_table.set("IS_FUN", BuiltInFunction.is_function)
-global_symbol_table.set("APPEND", BuiltInFunction.append)
-global_symbol_table.set("POP", BuiltInFunction.pop)
-global_symbol_table.set("EXTEND", BuiltInFunction.extend)
-
-
-def run(filename, text):
-    lexer = Lexer(filename, text)
-    tokens, error = lexer.make_tokens()
-
-    if error:
-        return None, error
-    print(tokens)
-    parser = Parser(tokens)
-
-    ast = parser.parse()
-    if ast.error:
-        return None, ast.error
-    print(ast.node)
-    interpreter = Interpreter()
-
-    context = Context('<program>')
-    context.symbol_table = global_symbol_table
-    result = interpreter.interpret(ast.node, context)
-    return result.value, result.error
+def run(filename, text, mode='interpret', scan=True, cache_dir=None, optimize=1, max_depth=MAX_DEPTH, tracer=None,
+        profiler=None, budget=None):
+    # Every run here shares global_symbol_table, as the shell expects
+    engine = Engine(mode, scan, cache_dir, optimize, max_depth, global_symbol_table)
+    return engine.run(filename, text, tracer, profiler, budget)
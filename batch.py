@@ -0,0 +1,176 @@
+import argparse
+import contextlib
+import io
+import json
+import signal
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from basic import Engine
+from budget import Budget
+
+# Scripts sent to a worker at a time, small ones are over before the
+# round trip to the worker is
+CHUNK_SIZE = 16
+
+# Seconds a script that ignores its timeout gets before it is interrupted,
+# and again before its worker is killed
+GRACE = 1.0
+
+# The engine of each worker process, made once when the worker starts
+engine = None
+
+
+# Not an Exception, so no handler in the interpreter that catches those
+# keeps a script running past its alarm
+class Timeout(BaseException):
+    pass
+
+
+def on_alarm(signum, frame):
+    raise Timeout()
+
+
+class Result:
+    # What running one script gave: the value as the shell would print it
+    # and the error as a string, either of them None, and what it printed
+    __slots__ = ('index', 'filename', 'value', 'error', 'output')
+
+    def __init__(self, index, filename, value, error, output):
+        self.index = index
+        self.filename = filename
+        self.value = value
+        self.error = error
+        self.output = output
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def start_worker(mode, optimize):
+    global engine
+    engine = Engine(mode=mode, optimize=optimize)
+    # There is no one to answer INPUT
+    sys.stdin = io.StringIO()
+    signal.signal(signal.SIGALRM, on_alarm)
+    # Left to its default, killing the worker, for a script stuck in one
+    # operation that never lets the alarm's handler run
+    signal.signal(signal.SIGVTALRM, signal.SIG_DFL)
+
+
+def run_script(index, filename, text, timeout):
+    # Each script starts from the builtins alone
+    engine.reset()
+    budget = Budget(seconds=timeout) if timeout else None
+    output = io.StringIO()
+    if timeout:
+        signal.setitimer(signal.ITIMER_REAL, timeout + GRACE)
+        # CPU time, so it runs out after the alarm
+        signal.setitimer(signal.ITIMER_VIRTUAL, timeout + 2 * GRACE)
+    try:
+        # The timers are stopped inside the outer try, an alarm going off
+        # just as the script ends is still caught
+        try:
+            with contextlib.redirect_stdout(output):
+                result, error = engine.run(filename, text, budget=budget)
+        finally:
+            if timeout:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+                signal.setitimer(signal.ITIMER_VIRTUAL, 0)
+    except Timeout:
+        result, error = None, f'Stopped after {timeout + GRACE}s'
+    except Exception as exception:
+        result, error = None, f'{type(exception).__name__}: {exception}'
+    if error is not None and not isinstance(error, str):
+        error = error.as_string()
+    value = None
+    if result is not None:
+        value = repr(result.get(0)) if result.size == 1 else repr(result)
+    return Result(index, filename, value, error, output.getvalue())
+
+
+def run_chunk(chunk, timeout):
+    return [run_script(index, filename, text, timeout) for index, filename, text in chunk]
+
+
+def run_batch(scripts, workers=None, timeout=None, mode='interpret', optimize=1, ordered=True,
+              chunk_size=CHUNK_SIZE):
+    # Runs (filename, text) pairs on a pool of worker processes and yields a
+    # Result for each, in the order of scripts or, unordered, as soon as it
+    # is done. A script over timeout seconds fails with an RTError like any
+    # other, its worker goes on to the next one.
+    scripts = [(index, filename, text) for index, (filename, text) in enumerate(scripts)]
+    tasks = [scripts[i:i + chunk_size] for i in range(0, len(scripts), chunk_size)]
+    done = {}
+    next_index = 0
+    for result in run_tasks(tasks, workers, timeout, mode, optimize):
+        if not ordered:
+            yield result
+            continue
+        done[result.index] = result
+        while next_index in done:
+            yield done.pop(next_index)
+            next_index += 1
+
+
+def run_tasks(tasks, workers, timeout, mode, optimize, alone=False):
+    # Yields the results of tasks, lists of scripts, as they are done. A
+    # worker dying loses the results of every task still running, those
+    # scripts run again one per task, then each in a pool of its own, where
+    # dying is its own doing.
+    lost = []
+    with ProcessPoolExecutor(1 if alone else workers, initializer=start_worker,
+                             initargs=(mode, optimize)) as executor:
+        futures = {executor.submit(run_chunk, task, timeout): task for task in tasks}
+        for future in as_completed(futures):
+            try:
+                yield from future.result()
+            except BrokenProcessPool:
+                lost.extend(futures[future])
+    if alone:
+        for index, filename, _ in lost:
+            yield Result(index, filename, None, 'The worker running it died', '')
+    elif any(len(task) > 1 for task in tasks):
+        if lost:
+            yield from run_tasks([[script] for script in lost], workers, timeout, mode, optimize)
+    else:
+        for script in lost:
+            yield from run_tasks([[script]], workers, timeout, mode, optimize, alone=True)
+
+
+def read_scripts(paths):
+    for path in paths:
+        with open(path) as file:
+            yield path, file.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run many BASIC programs in parallel, each on its own.')
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--workers', type=int, help='worker processes, one per CPU by default')
+    parser.add_argument('--timeout', type=float, help='seconds each program may run for')
+    parser.add_argument('--mode', choices=('interpret', 'vm'), default='interpret')
+    parser.add_argument('--unordered', action='store_true', help='give results as they are done')
+    parser.add_argument('--json', action='store_true', help='print one JSON object per program')
+    args = parser.parse_args()
+
+    failed = False
+    results = run_batch(read_scripts(args.files), args.workers, args.timeout, args.mode,
+                        ordered=not args.unordered)
+    for result in results:
+        failed = failed or result.error is not None
+        if args.json:
+            print(json.dumps(result.as_dict()))
+            continue
+        print(f'== {result.filename}')
+        print(result.output, end='')
+        if result.error:
+            print(result.error)
+        elif result.value is not None:
+            print(result.value)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
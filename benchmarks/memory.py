@@ -0,0 +1,62 @@
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from interpreter import Number, String, ListValue, Context, SymbolTable
+from lexer import Scanner
+from parser import Parser
+from tracing import count_nodes
+
+PROGRAM = '''VAR total = 0
+FUN square(x) -> x * x
+FUN describe(n) -> IF n < 10 THEN x "small" ELIF n < 100 THEN x "medium" ELSE "large"
+FOR i = 0 TO 50 THEN VAR total = total + square(i)
+VAR names = ["a", "b", "c", 1, 2.5]
+VAR half = NOT total == 0 AND -total / 2
+PRINT(describe(total))
+'''
+COPIES = 500
+VALUES = 100000
+
+
+def measure(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, size
+
+
+def per_value(name, make):
+    # The list holding them is measured on its own and taken off
+    payload = [None] * VALUES
+    _, list_size = measure(lambda: [payload[i] for i in range(VALUES)])
+    _, size = measure(lambda: [make(i) for i in range(VALUES)])
+    print(f'{name:<24}{(size - list_size) / VALUES:10.1f} bytes')
+
+
+def main():
+    text = PROGRAM * COPIES
+    tokens, size = measure(lambda: Scanner('<memory>', text).make_tokens()[0])
+    print(f'{"token":<24}{size / len(tokens):10.1f} bytes   ({len(tokens)} tokens)')
+    ast, size = measure(lambda: Parser(tokens).parse())
+    nodes = count_nodes(ast)
+    print(f'{"AST node":<24}{size / nodes:10.1f} bytes   ({nodes} nodes)')
+
+    number = 12345
+    string = 'memory'
+    elements = [Number(1), Number(2)]
+    per_value('Number', lambda i: Number(number))
+    per_value('String', lambda i: String(string))
+    per_value('ListValue', lambda i: ListValue(elements))
+    table = SymbolTable()
+    parent = Context('<memory>')
+    parent.symbol_table = table
+    per_value('Context + SymbolTable', lambda i: Context.enter('f', parent, None, {}, []))
+
+
+if __name__ == '__main__':
+    main()
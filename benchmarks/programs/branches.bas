@@ -0,0 +1,19 @@
+FUN bucket(n) -> IF n < 10 THEN x 0 ELIF n < 20 THEN x 1 ELIF n < 30 THEN x 2 ELIF n < 40 THEN x 3 ELIF n < 50 THEN x 4 ELIF n < 60 THEN x 5 ELIF n < 70 THEN x 6 ELIF n < 80 THEN x 7 ELIF n < 90 THEN x 8 ELSE 9
+VAR low = 0
+VAR middle = 0
+VAR high = 0
+FOR i = 0 TO 4000 THEN
+    VAR b = bucket(i / 40)
+    IF b < 3 THEN
+        VAR low = low + 1
+    ELIF b < 5 THEN
+        VAR middle = middle + 1
+    ELIF b == 5 THEN
+        VAR middle = middle + 2
+    ELIF b < 8 THEN
+        VAR high = high + 1
+    ELSE
+        VAR high = high + 2
+    END
+END
+[low, middle, high]
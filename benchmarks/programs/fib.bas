@@ -0,0 +1,2 @@
+FUN fib(n) -> IF n < 2 THEN x n ELSE fib(n - 1) + fib(n - 2)
+fib(20)
@@ -0,0 +1,11 @@
+VAR items = []
+VAR popped = 0
+FOR round = 0 TO 40 THEN
+    FOR i = 0 TO 200 THEN
+        APPEND(items, i)
+    END
+    FOR i = 0 TO 200 THEN
+        VAR popped = popped + POP(items, -1)
+    END
+END
+popped
@@ -0,0 +1,7 @@
+VAR total = 0
+FOR i = 0 TO 150 THEN
+    FOR j = 0 TO 150 THEN
+        VAR total = total + i * j - j
+    END
+END
+total
@@ -0,0 +1,11 @@
+VAR text = ""
+FOR i = 0 TO 3000 THEN
+    VAR text = text + "ab"
+END
+VAR rule = ""
+VAR rows = []
+FOR i = 0 TO 500 THEN
+    VAR rule = "-" * 4 + rule
+    APPEND(rows, "| " + rule + " |")
+END
+text
@@ -0,0 +1,120 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import basic
+from tracing import Tracer
+
+PROGRAMS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'programs')
+PHASES = ('lex', 'parse', 'optimize', 'compile', 'execute')
+
+
+def load_programs(names):
+    programs = {}
+    for file_name in sorted(os.listdir(PROGRAMS)):
+        name, extension = os.path.splitext(file_name)
+        if extension == '.bas' and (not names or name in names):
+            with open(os.path.join(PROGRAMS, file_name)) as file:
+                programs[name] = file.read()
+    return programs
+
+
+def run_once(name, text, mode, scan, tracer=None):
+    # PRINT output would only add noise to the timings
+    with contextlib.redirect_stdout(io.StringIO()):
+        result, error = basic.run(f'{name}.bas', text, mode=mode, scan=scan, tracer=tracer)
+    if error:
+        raise SystemExit(f'{name} ({mode}) failed:\n{error.as_string()}')
+
+
+def measure(name, text, mode, scan, repeat):
+    # Best of each phase over the repeats, then one more run for memory, as
+    # tracing allocations slows everything down
+    best = {}
+    for _ in range(repeat):
+        tracer = Tracer()
+        run_once(name, text, mode, scan, tracer)
+        for phase, seconds in tracer.timings.items():
+            best[phase] = min(seconds, best.get(phase, seconds))
+
+    tracemalloc.start()
+    run_once(name, text, mode, scan)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    result = {'program': name, 'mode': mode}
+    result.update((phase, best[phase]) for phase in PHASES if phase in best)
+    result['total'] = sum(best.values())
+    result['tokens'] = tracer.token_count
+    result['nodes'] = tracer.node_count
+    result['peak_memory'] = peak
+    return result
+
+
+def commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old, new):
+    old_results = {(result['program'], result['mode']): result for result in old['results']}
+    print(f'{"program":<12}{"mode":<11}{"phase":<13}{"old":>12}{"new":>12}{"change":>9}')
+    for result in new['results']:
+        previous = old_results.get((result['program'], result['mode']))
+        if not previous:
+            continue
+        for key in PHASES + ('total', 'peak_memory'):
+            if key in result and previous.get(key):
+                change = result[key] / previous[key] - 1
+                print(f'{result["program"]:<12}{result["mode"]:<11}{key:<13}'
+                      f'{previous[key]:>12.4g}{result[key]:>12.4g}{change:>+9.1%}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the lexer, parser and interpreter on the programs '
+                                                 'in benchmarks/programs and print the results as JSON.')
+    parser.add_argument('programs', nargs='*', help='program names, all of them by default')
+    parser.add_argument('--mode', choices=('interpret', 'vm', 'both'), default='both')
+    parser.add_argument('--lexer', choices=('scanner', 'chars'), default='scanner',
+                        help='the regex Scanner or the character Lexer')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='write the JSON here instead of stdout')
+    parser.add_argument('--compare', help='earlier JSON output to print the changes against')
+    args = parser.parse_args()
+
+    programs = load_programs(args.programs)
+    modes = ('interpret', 'vm') if args.mode == 'both' else (args.mode,)
+    results = [measure(name, text, mode, args.lexer == 'scanner', args.repeat)
+               for name, text in programs.items() for mode in modes]
+    report = {
+        'commit': commit(),
+        'python': platform.python_version(),
+        'lexer': args.lexer,
+        'repeat': args.repeat,
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=1)
+    else:
+        print(json.dumps(report, indent=1))
+    if args.compare:
+        with open(args.compare) as file:
+            compare(json.load(file), report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from error import RTError
+from nodes import count_nodes
+
+class Active(threading.local):
+    # The budget of the run in progress on this thread
+    budget = None
+
+
+active = Active()
+
+
+class Budget:
+    # Limits on one run: steps taken, seconds of wall clock and characters,
+    # list elements and bytes of big ints allocated, None for no limit.
+    # Rather than per node, the interpreter charges each loop iteration and
+    # call the number of nodes in its body, and the VM each backward jump
+    # and call the number of instructions it passes, so a run without a
+    # budget pays one test. Each charge and allocation looks at the clock.
+    def __init__(self, steps=None, seconds=None, allocation=None):
+        self.steps = steps
+        self.seconds = seconds
+        self.allocation = allocation
+        self.used = 0
+        self.allocated = 0
+        self.deadline = None
+        self.costs = {}
+
+    @contextmanager
+    def running(self):
+        self.used = 0
+        self.allocated = 0
+        self.deadline = time.monotonic() + self.seconds if self.seconds is not None else None
+        previous, active.budget = active.budget, self
+        try:
+            yield self
+        finally:
+            active.budget = previous
+
+    def cost(self, node):
+        cost = self.costs.get(node)
+        if cost is None:
+            cost = self.costs[node] = count_nodes(node)
+        return cost
+
+    def charge(self, steps, span, context):
+        self.used += steps
+        if self.steps is not None and self.used > self.steps:
+            raise RTError(span.pos_start, span.pos_end, f"Step budget of {self.steps} exceeded", context)
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise RTError(span.pos_start, span.pos_end, self.time_message(), context)
+
+    def allocate(self, size):
+        # Checked before the allocation is made, the caller gives the error
+        # its location
+        self.allocated += size
+        if self.allocation is not None and self.allocated > self.allocation:
+            raise RTError(None, None, f"Allocation budget of {self.allocation} exceeded", None)
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise RTError(None, None, self.time_message(), None)
+
+    def time_message(self):
+        return f"Time budget of {self.seconds}s exceeded"
@@ -0,0 +1,118 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+CACHE_DIR = '__basiccache__'
+
+# Every module the pipeline from text to a cached program imports, the ones
+# defining what is pickled and the ones deciding what it holds: the folded
+# tree, the names a function keeps local, which code is pure. Keys include a
+# hash of their source, so an entry is only ever read by the code that wrote
+# it.
+PIPELINE_MODULES = (
+    'basic', 'budget', 'cache', 'compiler', 'error', 'interpreter', 'lexer', 'nodes', 'operators', 'optimizer',
+    'parser', 'position', 'purity', 'resolver', 'string_with_arrows', 'token_',
+)
+
+
+def source_version():
+    digest = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in PIPELINE_MODULES:
+        with open(os.path.join(directory, name + '.py'), 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+VERSION = source_version()
+
+
+class Cache:
+    def __init__(self, directory=CACHE_DIR, max_size=64 * 1024 * 1024):
+        self.directory = directory
+        self.max_size = max_size
+
+    def key(self, filename, text, kind):
+        digest = hashlib.sha256()
+        for part in (VERSION, kind, filename, text):
+            digest.update(part.encode('utf-8', 'surrogatepass'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + '.pickle')
+
+    def load(self, key):
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as file:
+                program = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            self.remove(path)
+            return None
+        try:
+            # Touch the entry so eviction drops the least recently used ones first
+            os.utime(path)
+        except OSError:
+            pass
+        return program
+
+    def store(self, key, program):
+        try:
+            data = pickle.dumps(program, pickle.HIGHEST_PROTOCOL)
+        except (RecursionError, pickle.PicklingError):
+            return False
+        if len(data) > self.max_size:
+            return False
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+            os.replace(tmp_path, self.path(key))
+        except OSError:
+            return False
+        self.evict()
+        return True
+
+    def entries(self):
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.endswith('.pickle'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_size:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            self.remove(path)
+            total -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            self.remove(path)
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,292 @@
+from interpreter import String, number
+from nodes import ListNode, VarAssignNode, IfNode, CallNode, value_node
+from operators import Operation
+from position import Location
+from purity import is_pure
+from resolver import Resolver, LOCAL, GLOBAL
+
+LOAD_CONST = 0
+LOAD_NULL = 1
+LOAD_NAME = 2
+LOAD_FAST = 3
+STORE_FAST = 4
+DELETE_FAST = 5
+LOAD_GLOBAL = 6
+STORE_GLOBAL = 7
+DELETE_GLOBAL = 8
+BINARY_OP = 9
+UNARY_OP = 10
+POP_TOP = 11
+DUP_TOP = 12
+JUMP = 13
+POP_JUMP_IF_FALSE = 14
+BUILD_LIST = 15
+NEW_ACC = 16
+ACC_APPEND = 17
+FOR_RANGE = 18
+FOR_ITER = 19
+MAKE_FUNCTION = 20
+CALL = 21
+RETURN = 22
+TAIL_CALL = 23
+
+OPNAMES = {value: name for name, value in globals().items() if name.isupper() and isinstance(value, int)}
+
+class Code:
+    def __init__(self, name, arg_names, should_return_null, local_index=None):
+        self.name = name
+        self.arg_names = arg_names
+        self.should_return_null = should_return_null
+        self.local_index = local_index or {}
+        self.global_names = []
+        self.ops = []
+        self.args = []
+        self.positions = []
+        self.link_cache = None
+        # On a program's code, the names its functions keep local
+        self.function_locals = None
+        # Set when the code can leave an argument unset, by looping over it
+        self.unsets_args = False
+        self.pure = False
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['link_cache'] = None
+        return state
+
+    def global_slot(self, name):
+        if name not in self.global_names:
+            self.global_names.append(name)
+        return self.global_names.index(name)
+
+    def link(self, symbol_table):
+        # Map this code's global names onto slots of one particular table.
+        # A function reading a name that some function run against the table
+        # keeps local may get a caller's, so it has no slot and looks it up.
+        shadowed = symbol_table.function_locals if self.function_locals is None else None
+        link_cache = self.link_cache
+        if link_cache is None or link_cache[0] is not symbol_table or link_cache[1] is not shadowed:
+            links = [None if shadowed and name in shadowed else symbol_table.index_of(name)
+                     for name in self.global_names]
+            link_cache = self.link_cache = symbol_table, shadowed, links
+        return link_cache[2]
+
+    def can_replace(self, code):
+        # Whether a call to this code may take over a frame running code.
+        # Names are looked up through the callers' tables, so each name the
+        # replaced frame holds must be hidden behind one of our arguments.
+        return not self.unsets_args and all(name in self.arg_names for name in code.local_index)
+
+    def emit(self, op, arg=None, node=None):
+        self.ops.append(op)
+        self.args.append(arg)
+        self.positions.append(Location(node.source, node.start, node.end) if node else None)
+        return len(self.ops) - 1
+
+    def position(self, index):
+        return self.positions[index]
+
+    def patch(self, index, arg):
+        self.args[index] = arg
+
+    def here(self):
+        return len(self.ops)
+
+    def disassemble(self):
+        lines = []
+        for i, (op, arg) in enumerate(zip(self.ops, self.args)):
+            lines.append(f"{i:4} {OPNAMES[op]:<18} {'' if arg is None else arg}")
+        return '\n'.join(lines)
+
+    def __repr__(self):
+        return f"<code {self.name or '<program>'}>"
+
+
+class Compiler:
+    def compile(self, node, whole_program=True):
+        self.resolver = Resolver().resolve(node, whole_program)
+        self.scope = None
+        code = Code(None, [], False)
+        code.function_locals = frozenset(self.resolver.function_locals)
+        self.compile_node(node, code)
+        code.emit(RETURN)
+        return code
+
+    def compile_node(self, node, code):
+        method_name = f'compile_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_compile_method)
+        method(node, code)
+
+    def no_compile_method(self, node, code):
+        raise Exception(f'No compile_{type(node).__name__} method defined')
+
+    def compile_NumberNode(self, node, code):
+        code.emit(LOAD_CONST, number(node.token.value), node)
+
+    def compile_StringNode(self, node, code):
+        code.emit(LOAD_CONST, String.intern(node.token.value), node)
+
+    def compile_ListNode(self, node, code):
+        for element_node in node.element_nodes:
+            self.compile_node(element_node, code)
+        code.emit(BUILD_LIST, len(node.element_nodes), node)
+
+    def compile_VarAccessNode(self, node, code):
+        name = node.var_name_token.value
+        kind = self.resolver.lookup(name, self.scope)
+        if kind == LOCAL:
+            code.emit(LOAD_FAST, (code.local_index[name], name), node)
+        elif kind == GLOBAL:
+            code.emit(LOAD_GLOBAL, (code.global_slot(name), name), node)
+        else:
+            code.emit(LOAD_NAME, name, node)
+
+    def compile_VarAssignNode(self, node, code):
+        self.compile_node(node.value_node, code)
+        code.emit(DUP_TOP)
+        self.compile_store(node.var_name_token.value, code, node)
+
+    def compile_store(self, name, code, node=None):
+        # Stores pop the value, an assignment used as a value dups it first
+        store_op, store_arg = self.store_target(name, code)
+        code.emit(store_op, store_arg, node)
+
+    def store_target(self, name, code):
+        if self.scope:
+            return STORE_FAST, code.local_index[name]
+        return STORE_GLOBAL, code.global_slot(name)
+
+    def compile_BinOpNode(self, node, code):
+        self.compile_node(node.left_node, code)
+        self.compile_node(node.right_node, code)
+        code.emit(BINARY_OP, Operation(node.operation.operator), value_node(node.right_node))
+
+    def compile_UnaryOpNode(self, node, code):
+        self.compile_node(node.node, code)
+        if node.operation:
+            code.emit(UNARY_OP, Operation(node.operation.operator), node.node)
+
+    def compile_IfNode(self, node, code):
+        end_jumps = []
+        for condition, expr, should_return_null in node.cases:
+            self.compile_node(condition, code)
+            next_case = code.emit(POP_JUMP_IF_FALSE)
+            self.compile_branch(expr, should_return_null, code)
+            end_jumps.append(code.emit(JUMP))
+            code.patch(next_case, code.here())
+        if node.else_case:
+            expr, should_return_null = node.else_case
+            self.compile_branch(expr, should_return_null, code)
+        else:
+            code.emit(LOAD_NULL)
+        for jump in end_jumps:
+            code.patch(jump, code.here())
+
+    def compile_branch(self, node, should_return_null, code):
+        if should_return_null:
+            self.compile_discarded(node, code)
+            code.emit(LOAD_NULL)
+        else:
+            self.compile_node(node, code)
+
+    def compile_discarded(self, node, code):
+        # Statements whose values nobody reads are popped one by one rather
+        # than collected into a list first
+        for statement in node.element_nodes if type(node) is ListNode else [node]:
+            if type(statement) is VarAssignNode:
+                self.compile_node(statement.value_node, code)
+                self.compile_store(statement.var_name_token.value, code, statement)
+            else:
+                self.compile_node(statement, code)
+                code.emit(POP_TOP)
+
+    def compile_ForNode(self, node, code):
+        var_name = node.var_name_tok.value
+        if not node.should_return_null:
+            code.emit(NEW_ACC)
+        self.compile_node(node.start_value_node, code)
+        self.compile_node(node.end_value_node, code)
+        if node.step_value_node:
+            self.compile_node(node.step_value_node, code)
+        else:
+            code.emit(LOAD_CONST, number(1))
+        code.emit(FOR_RANGE, None, node)
+        store_op, store_arg = self.store_target(var_name, code)
+        if var_name in code.arg_names:
+            code.unsets_args = True
+        loop_start = code.emit(FOR_ITER)
+        if node.should_return_null:
+            self.compile_discarded(node.body_value_node, code)
+        else:
+            self.compile_node(node.body_value_node, code)
+            code.emit(ACC_APPEND, 2)
+        code.emit(JUMP, loop_start, node)
+        code.patch(loop_start, (code.here(), store_op, store_arg))
+        code.emit(DELETE_FAST if store_op == STORE_FAST else DELETE_GLOBAL, store_arg)
+        if node.should_return_null:
+            code.emit(LOAD_NULL)
+
+    def compile_WhileNode(self, node, code):
+        if not node.should_return_null:
+            code.emit(NEW_ACC)
+        self.compile_node(node.condition_node, code)
+        loop_start = code.emit(POP_JUMP_IF_FALSE)
+        self.compile_discarded(node.body_node, code)
+        self.compile_node(node.condition_node, code)
+        if not node.should_return_null:
+            code.emit(DUP_TOP)
+            code.emit(ACC_APPEND, 2)
+        code.emit(JUMP, loop_start, node)
+        code.patch(loop_start, code.here())
+        if node.should_return_null:
+            code.emit(LOAD_NULL)
+
+    def compile_FuncDefNode(self, node, code):
+        func_name = node.var_name_tok.value if node.var_name_tok else None
+        arg_names = [arg_name.value for arg_name in node.arg_name_toks]
+        scope = self.resolver.scope_of(node)
+        func_code = Code(func_name, arg_names, node.should_return_null, scope.local_index)
+        func_code.pure = is_pure(func_code.name or "<anonymous>", arg_names, node.body_node)
+        enclosing_scope, self.scope = self.scope, scope
+        if node.should_return_null:
+            self.compile_branch(node.body_node, True, func_code)
+            func_code.emit(RETURN)
+        else:
+            self.compile_tail(node.body_node, func_code)
+        self.scope = enclosing_scope
+        code.emit(MAKE_FUNCTION, func_code, node)
+        if func_name:
+            code.emit(DUP_TOP)
+            self.compile_store(func_name, code, node)
+
+    def compile_tail(self, node, code):
+        # Returns node's value from the function. A call whose value is
+        # returned as is replaces the caller's frame instead of adding one.
+        if type(node) is CallNode:
+            self.compile_CallNode(node, code, TAIL_CALL)
+        elif type(node) is IfNode:
+            for condition, expr, should_return_null in node.cases:
+                self.compile_node(condition, code)
+                next_case = code.emit(POP_JUMP_IF_FALSE)
+                self.compile_branch_tail(expr, should_return_null, code)
+                code.patch(next_case, code.here())
+            if node.else_case:
+                self.compile_branch_tail(*node.else_case, code)
+                return
+            code.emit(LOAD_NULL)
+        else:
+            self.compile_node(node, code)
+        code.emit(RETURN)
+
+    def compile_branch_tail(self, node, should_return_null, code):
+        if should_return_null:
+            self.compile_branch(node, should_return_null, code)
+            code.emit(RETURN)
+        else:
+            self.compile_tail(node, code)
+
+    def compile_CallNode(self, node, code, call_op=CALL):
+        self.compile_node(node.node_to_call, code)
+        for arg_node in node.arg_nodes:
+            self.compile_node(arg_node, code)
+        code.emit(call_op, len(node.arg_nodes), node)
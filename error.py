@@ -1,13 +1,18 @@
 from string_with_arrows import string_with_arrows
 
 
-class Error:
+class Error(Exception):
     def __init__(self, pos_start, pos_end, error_name, details):
         self.error_name = error_name
         self.details = details
         self.pos_start = pos_start
         self.pos_end = pos_end
 
+    def set_pos(self, pos_start, pos_end):
+        self.pos_start = pos_start
+        self.pos_end = pos_end
+        return self
+
     def as_string(self):
         result = f"{self.error_name}: {self.details} \n"
         result += f'File {self.pos_start.file_name}, line {self.pos_start.line + 1}'
@@ -35,6 +40,10 @@ class RTError(Error):
         super().__init__(pos_start, pos_end, "Runtime Error", details)
         self.context = context
 
+    def set_context(self, context):
+        self.context = context
+        return self
+
     def as_string(self):
         result = self.generate_traceback()
         result += f"{self.error_name}: {self.details}"
@@ -42,11 +51,11 @@ class RTError(Error):
         return result
 
     def generate_traceback(self):
-        result = ''
+        lines = []
         pos = self.pos_start
         ctx = self.context
         while ctx:
-            result = f' File {pos.file_name}, line {str(pos.line + 1)}, in {ctx.display_name} \n' + result
+            lines.append(f' File {pos.file_name}, line {str(pos.line + 1)}, in {ctx.display_name} \n')
             pos = ctx.parent_entry_pos
             ctx = ctx.parent
-        return "Traceback (most recent call last): \n" + result
+        return "Traceback (most recent call last): \n" + ''.join(reversed(lines))
@@ -0,0 +1,189 @@
+from error import InvalidSyntaxError
+from lexer import Scanner
+from nodes import ListNode, child_slots
+from parser import Parser
+from position import Source, ChunkSource, Location, Span
+from token_ import TokenType
+
+# Statements after the edited ones an edit is first tried on, before the
+# rest of the text is parsed
+NEAR_CHUNKS = 16
+
+
+class StatementParser(Parser):
+    # Notes where each top level statement starts, and whether a block ran
+    # into the end of the tokens, where it could have gone on
+    def __init__(self, tokens):
+        self.depth = 0
+        self.starts = []
+        self.open_block = False
+        super().__init__(tokens)
+
+    def statements(self):
+        node = super().statements()
+        if self.depth and self.current_token.type == TokenType.EOF:
+            self.open_block = True
+        return node
+
+    def expr(self):
+        start = self.current_token.start
+        self.depth += 1
+        try:
+            node = super().expr()
+        finally:
+            self.depth -= 1
+        if not self.depth:
+            self.starts.append(start)
+        return node
+
+
+class Chunk:
+    # One top level statement with the newlines after it. Its tokens and
+    # nodes hold offsets relative to source.base. A broken chunk has no node
+    # but the error parsing it to the end failed with.
+    __slots__ = ('source', 'node', 'error', 'error_span')
+
+    def __init__(self, source, node, error=None, error_span=None):
+        self.source = source
+        self.node = node
+        self.error = error
+        self.error_span = error_span
+
+
+class Document:
+    # Text that is edited in place, reparsed one statement at a time.
+    # Statements split where the parser stops anyway, at a newline at the
+    # top level, so a statement parses the same on its own as it does in
+    # the whole text and the ones an edit does not touch can be kept.
+    def __init__(self, filename, text):
+        self.source = Source(filename, text)
+        self.chunks = [Chunk(ChunkSource(self.source, 0), None)]
+        self.reparse(0, 0)
+
+    @property
+    def text(self):
+        return self.source.text
+
+    def edit(self, offset, removed, inserted):
+        chunks = self.chunks
+        first = self.chunk_index(offset)
+        last = self.chunk_index(offset + removed - 1) if removed else first
+
+        text = self.source.text
+        self.source.text = text[:offset] + inserted + text[offset + removed:]
+        self.source.line_starts = None
+        shift = len(inserted) - removed
+        if shift:
+            for i in range(last + 1, len(chunks)):
+                chunks[i].source.base += shift
+
+        self.reparse(first, last)
+        return self.parse()
+
+    def parse(self):
+        chunk = self.chunks[-1]
+        if chunk.node is None:
+            span = chunk.error_span
+            return None, chunk.error.set_pos(span.pos_start, span.pos_end)
+        statements = [chunk.node for chunk in self.chunks]
+        return ListNode(statements, 0, len(self.source.text), self.source), None
+
+    def chunk_index(self, offset):
+        chunks = self.chunks
+        low, high = 0, len(chunks)
+        while high - low > 1:
+            middle = (low + high) // 2
+            if chunks[middle].source.base <= offset:
+                low = middle
+            else:
+                high = middle
+        return low
+
+    def chunk_end(self, index):
+        if index + 1 < len(self.chunks):
+            return self.chunks[index + 1].source.base
+        return len(self.source.text)
+
+    def reparse(self, first, last):
+        chunks = self.chunks
+        start = chunks[first].source.base
+        # An edit can join a statement with the ones after it. Take in a few
+        # more of them, then parse all of the rest once and split it, rather
+        # than parsing ever longer regions.
+        end_index, step = last, 1
+        while True:
+            new_chunks, error = self.parse_region(start, self.chunk_end(end_index))
+            if new_chunks is not None:
+                chunks[first:end_index + 1] = new_chunks
+                return
+            if end_index + 1 == len(chunks):
+                break
+            end_index += step
+            step *= 2
+            if end_index - last > NEAR_CHUNKS:
+                end_index = len(chunks) - 1
+
+        # Where it stops parsing is only known by parsing to the end, so the
+        # rest of the text stays one broken chunk until an edit fixes it
+        source = ChunkSource(self.source, start)
+        error_span = Location(source, error.pos_start.index - start, error.pos_end.index - start)
+        chunks[first:] = [Chunk(source, None, error, error_span)]
+
+    def parse_region(self, start, end):
+        filename = self.source.file_name
+        text = self.source.text[start:end]
+        source = ChunkSource(self.source, start)
+        tokens, error = Scanner(filename, text, source).make_tokens()
+        if error:
+            return None, error
+        # Unless it runs to the end, a region has to end between statements
+        if end < len(self.source.text) and (len(tokens) < 2 or tokens[-2].type != TokenType.NEWLINE):
+            return None, None
+
+        parser = StatementParser(tokens)
+        try:
+            ast = parser.parse()
+        except InvalidSyntaxError as error:
+            if not start or parser.starts:
+                return None, error
+            # After other statements the parser backs out of one it cannot
+            # parse and stops there instead
+            token = next(token for token in tokens if token.type != TokenType.NEWLINE)
+            if token.type == TokenType.EOF:
+                return [], None
+            return None, InvalidSyntaxError(token.pos_start, token.pos_end, "Expected +-*/")
+        if parser.open_block and end < len(self.source.text):
+            return None, None
+        if len(parser.starts) == 1:
+            return [Chunk(source, ast.element_nodes[0])], None
+
+        starts = parser.starts
+        starts[0] = 0
+        chunks = [Chunk(source, ast.element_nodes[0])]
+        for i in range(1, len(starts)):
+            chunk_source = ChunkSource(self.source, start + starts[i])
+            chunks.append(Chunk(chunk_source, rebase(ast.element_nodes[i], chunk_source, starts[i])))
+        return chunks, None
+
+
+def rebase(node, source, offset):
+    # Moves a statement parsed in a longer region, and its tokens, onto the
+    # source of its own chunk, as if it had been parsed there. The parser
+    # puts each node and token in one place in the tree.
+    stack = [node]
+    while stack:
+        span = stack.pop()
+        span.source = source
+        span.start -= offset
+        span.end -= offset
+        for name in child_slots(type(span)):
+            value = getattr(span, name, None)
+            if isinstance(value, Span):
+                stack.append(value)
+            elif isinstance(value, (list, tuple)):
+                for item in value:
+                    if isinstance(item, tuple):
+                        stack.extend(child for child in item if isinstance(child, Span))
+                    elif isinstance(item, Span):
+                        stack.append(item)
+    return node
@@ -1,155 +1,122 @@
+import operator
 import os
+import threading
+from array import array
+from collections import OrderedDict
 
+from budget import active
 from error import RTError
-from token_ import TokenType
+from nodes import ListNode, value_node
+from operators import register_fast_path, binary_operation
+from purity import is_pure
 
-KEYWORDS = ["VAR", "AND", "OR", "NOT", "IF",
-            "THEN", "ELSE", "ELIF", "FOR", "TO", "STEP", "WHILE", "FUN", "END"]
+# Results a memoized function keeps, the least recently used go first
+MEMO_SIZE = 4096
 
+# Literal strings kept interned, the oldest go first
+INTERN_SIZE = 4096
 
-class RTResult:
-    def __init__(self):
-        self.value = None
-        self.error = None
-
-    def register(self, res):
-        if res.error:
-            self.error = res.error
-        return res.value
+# Lists of at least this many numbers of one kind are stored as arrays
+COMPACT_SIZE = 16
+ARRAY_TYPECODES = {int: 'q', float: 'd'}
 
-    def success(self, value):
-        self.value = value
-        return self
-
-    def failure(self, error):
-        self.error = error
-        return self
+KEYWORDS = ["VAR", "AND", "OR", "NOT", "IF",
+            "THEN", "ELSE", "ELIF", "FOR", "TO", "STEP", "WHILE", "FUN", "END"]
 
 
 class Value:
-    def __init__(self):
-        self.set_pos()
-        self.set_context()
+    __slots__ = ()
 
-    def set_context(self, context=None):
-        self.context = context
-        return self
+    def illegal_operation(self, other=None):
+        return RTError(None, None, "Illegal operation", None)
 
-    def set_pos(self, pos_start=None, pos_end=None):
-        self.pos_start = pos_start
-        self.pos_end = pos_end
-        return self
-
-    def illegal_operation(self, other):
-        if not other: other = self
-        return RTError(
-            other.pos_start, other.pos_end,
-            "Illegal operation",
-            self.context
-        )
+    def negated(self):
+        return binary_operation('multed_by', self, number(-1))
 
 
 class Number(Value):
+    __slots__ = ('value',)
+
     def __init__(self, value):
-        super().__init__()
         self.value = value
 
     def added_to(self, other):
         if isinstance(other, Number):
-            return Number(self.value + other.value).set_context(self.context).set_pos(self.pos_start,
-                                                                                      other.pos_end), None
+            return number(self.value + other.value)
         else:
-            return None, Value.illegal_operation(self, other)
+            raise self.illegal_operation(other)
 
     def subbed_by(self, other):
         if isinstance(other, Number):
-            return Number(self.value - other.value).set_context(self.context).set_pos(self.pos_start,
-                                                                                      other.pos_end), None
+            return number(self.value - other.value)
         else:
-            return None, Value.illegal_operation(self, other)
+            raise self.illegal_operation(other)
 
     def multed_by(self, other):
         if isinstance(other, Number):
-            return Number(self.value * other.value).set_context(self.context).set_pos(self.pos_start,
-                                                                                      other.pos_end), None
+            return multiply_numbers(self, other)
         else:
-            return None, Value.illegal_operation(self, other)
+            raise self.illegal_operation(other)
 
     def dived_by(self, other):
         if isinstance(other, Number):
             if other.value == 0:
-                return None, RTError(other.pos_start, other.pos_end, 'Division by zero', self.context)
-            return Number(self.value / other.value).set_context(self.context).set_pos(self.pos_start,
-                                                                                      other.pos_end), None
+                raise RTError(None, None, 'Division by zero', None)
+            return number(self.value / other.value)
         else:
-            return None, Value.illegal_operation(self, other)
+            raise self.illegal_operation(other)
 
     def eq(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value == other.value)).set_context(self.context).set_pos(self.pos_start,
-                                                                                            other.pos_end), None
+            return Number.true if self.value == other.value else Number.false
         else:
-            return None, Value.illegal_operation(self, other)
+            raise self.illegal_operation(other)
 
     def neq(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value != other.value)).set_context(self.context).set_pos(self.pos_start,
-                                                                                            other.pos_end), None
+            return Number.true if self.value != other.value else Number.false
 
         else:
-            return None, Value.illegal_operation(self, other)
+            raise self.illegal_operation(other)
 
     def gt(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value > other.value)).set_context(self.context).set_pos(self.pos_start,
-                                                                                           other.pos_end), None
+            return Number.true if self.value > other.value else Number.false
         else:
-            return None, Value.illegal_operation(self, other)
+            raise self.illegal_operation(other)
 
     def gte(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value >= other.value)).set_context(self.context).set_pos(self.pos_start,
-                                                                                            other.pos_end), None
+            return Number.true if self.value >= other.value else Number.false
         else:
-            return None, Value.illegal_operation(self, other)
+            raise self.illegal_operation(other)
 
     def lt(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value < other.value)).set_context(self.context).set_pos(self.pos_start,
-                                                                                           other.pos_end), None
+            return Number.true if self.value < other.value else Number.false
         else:
-            return None, Value.illegal_operation(self, other)
+            raise self.illegal_operation(other)
 
     def lte(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value <= other.value)).set_context(self.context).set_pos(self.pos_start,
-                                                                                            other.pos_end), None
+            return Number.true if self.value <= other.value else Number.false
         else:
-            return None, Value.illegal_operation(self, other)
+            raise self.illegal_operation(other)
 
     def and_(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value and other.value)).set_context(self.context).set_pos(self.pos_start,
-                                                                                             other.pos_end), None
+            return number(int(self.value and other.value))
         else:
-            return None, Value.illegal_operation(self, other)
+            raise self.illegal_operation(other)
 
     def notted(self):
-        return Number(int(not self.value)).set_context(self.context).set_pos(self.pos_start,
-                                                                             self.pos_end), None
+        return number(int(not self.value))
 
     def or_(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value or other.value)).set_context(self.context).set_pos(self.pos_start,
-                                                                                            other.pos_end), None
+            return number(int(self.value or other.value))
         else:
-            return None, Value.illegal_operation(self, other)
-
-    def copy(self):
-        copy = Number(self.value)
-        copy.set_pos(self.pos_start, self.pos_end)
-        copy.set_context(self.context)
-        return copy
+            raise self.illegal_operation(other)
 
     def __repr__(self):
         return str(self.value)
@@ -159,116 +126,199 @@ Number.null = Number(0)
 Number.false = Number(0)
 Number.true = Number(1)
 
+# Ints in [SMALL_INT_MIN, SMALL_INT_MAX] are made once and shared, values
+# never change so every 0 or loop counter can be the same object
+SMALL_INT_MIN = -5
+SMALL_INT_MAX = 256
+small_ints = []
+
+
+def cache_small_ints(low, high):
+    global SMALL_INT_MIN, SMALL_INT_MAX, small_ints
+    SMALL_INT_MIN = low
+    SMALL_INT_MAX = high
+    small_ints = [Number(value) for value in range(low, high + 1)]
+
+
+def number(value):
+    if type(value) is int and SMALL_INT_MIN <= value <= SMALL_INT_MAX:
+        return small_ints[value - SMALL_INT_MIN]
+    return Number(value)
+
+
+cache_small_ints(SMALL_INT_MIN, SMALL_INT_MAX)
+
+
+def multiply_numbers(left, right):
+    # The only operation that grows ints quickly, a budget pays for the
+    # bytes of any product past a machine word
+    left, right = left.value, right.value
+    if active.budget and type(left) is int and type(right) is int:
+        bits = left.bit_length() + right.bit_length()
+        if bits > 64:
+            active.budget.allocate(bits >> 3)
+    return number(left * right)
+
+
+def divide_numbers(left, right):
+    if right.value == 0:
+        raise RTError(None, None, 'Division by zero', None)
+    return number(left.value / right.value)
+
+
+register_fast_path('added_to', Number, Number, lambda left, right: number(left.value + right.value))
+register_fast_path('subbed_by', Number, Number, lambda left, right: number(left.value - right.value))
+register_fast_path('multed_by', Number, Number, multiply_numbers)
+register_fast_path('dived_by', Number, Number, divide_numbers)
+register_fast_path('eq', Number, Number, lambda left, right: Number.true if left.value == right.value else Number.false)
+register_fast_path('neq', Number, Number, lambda left, right: Number.true if left.value != right.value else Number.false)
+register_fast_path('lt', Number, Number, lambda left, right: Number.true if left.value < right.value else Number.false)
+register_fast_path('gt', Number, Number, lambda left, right: Number.true if left.value > right.value else Number.false)
+register_fast_path('lte', Number, Number, lambda left, right: Number.true if left.value <= right.value else Number.false)
+register_fast_path('gte', Number, Number, lambda left, right: Number.true if left.value >= right.value else Number.false)
+register_fast_path('and_', Number, Number, lambda left, right: number(int(left.value and right.value)))
+register_fast_path('or_', Number, Number, lambda left, right: number(int(left.value or right.value)))
+register_fast_path('negated', Number, None, lambda operand: number(-operand.value))
+register_fast_path('notted', Number, None, lambda operand: number(int(not operand.value)))
+
 
 class BaseFunction(Value):
+    __slots__ = ('name',)
+
     def __int__(self, name):
-        super().__init__()
         self.name = name or "<anonymous>"
 
-    def generate_new_context(self):
-        new_context = Context(self.name, self.context, self.pos_start)
-        new_context.symbol_table = SymbolTable(new_context.parent.symbol_table)
+    def generate_new_context(self, context, call_span):
+        new_context = Context(self.name, context, call_span)
+        new_context.symbol_table = SymbolTable(context.symbol_table)
         return new_context
 
-    def check_args(self, arg_names, args):
-        res = RTResult()
+    def check_args(self, arg_names, args, context, call_span):
         if len(args) > len(arg_names):
-            return res.failure(RTError(
-                self.pos_start, self.pos_end,
+            raise RTError(
+                call_span.pos_start, call_span.pos_end,
                 f"{len(args) - len(arg_names)} too many args passed into '{self.name}'",
-                self.context
-            ))
+                context
+            )
         if len(args) < len(arg_names):
-            return res.failure(RTError(
-                self.pos_start, self.pos_end,
+            raise RTError(
+                call_span.pos_start, call_span.pos_end,
                 f"{len(arg_names) - len(args)} too few args passed into '{self.name}'",
-                self.context
-            ))
-        return res.success(None)
+                context
+            )
 
     def populate_args(self, arg_names, args, exec_ctx):
         for i in range(len(args)):
-            arg_name = arg_names[i]
-            arg_value = args[i]
-            arg_value.set_context(exec_ctx)
-            exec_ctx.symbol_table.set(arg_name, arg_value)
+            exec_ctx.symbol_table.set(arg_names[i], args[i])
         return exec_ctx
 
-    def check_and_populate_args(self, arg_names, args, exec_ctx):
-        res = RTResult()
-        res.register(self.check_args(arg_names, args))
-        if res.error: return res
+    def check_and_populate_args(self, arg_names, args, exec_ctx, call_span):
+        self.check_args(arg_names, args, exec_ctx.parent, call_span)
         self.populate_args(arg_names, args, exec_ctx)
-        return res.success(None)
 
 
 class Function(BaseFunction):
+    __slots__ = ('body_node', 'arg_names', 'should_return_null', 'arg_index')
+
     def __init__(self, name, body_node, arg_names, should_return_null):
-        super().__init__()
         self.name = name or "<anonymous>"
         self.body_node = body_node
         self.arg_names = arg_names
         self.should_return_null = should_return_null
+        # Arguments land in the first slots of the call's symbol table
+        self.arg_index = {arg_name: i for i, arg_name in enumerate(arg_names)}
 
-    def execute(self, args):
-        res = RTResult()
-        interpreter = Interpreter()
-        exec_context = self.generate_new_context()
-        self.check_and_populate_args(self.arg_names, args, exec_context)
+    def execute(self, args, context, call_span):
+        # Called from a builtin, such as MEMO, through the run's interpreter
+        return running.interpreter.call(self, list(args), context, call_span)
 
-        value = res.register(interpreter.interpret(self.body_node, exec_context))
-        if res.error: return res
-        return res.success(Number.null if self.should_return_null else value)
-
-    def copy(self):
-        copy = Function(self.name, self.body_node, self.arg_names, self.should_return_null)
-        copy.set_context(self.context)
-        copy.set_pos(self.pos_start, self.pos_end)
-        return copy
+    def is_pure(self):
+        return is_pure(self.name, self.arg_names, self.body_node)
 
     def __repr__(self):
         return f"<function {self.name}>"
 
 
+class MemoFunction(BaseFunction):
+    __slots__ = ('function', 'max_size', 'results', 'hits', 'misses')
+
+    def __init__(self, function, max_size=MEMO_SIZE):
+        self.name = function.name
+        self.function = function
+        self.max_size = max_size
+        self.results = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def execute(self, args, context, call_span):
+        key = self.key(args)
+        if key is None:
+            return self.function.execute(args, context, call_span)
+        results = self.results
+        value = results.get(key)
+        if value is not None:
+            results.move_to_end(key)
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = self.function.execute(args, context, call_span)
+        # Lists and functions are mutable or compared by identity, a cached
+        # one would be shared between callers
+        if type(value) is Number or type(value) is String:
+            results[key] = value
+            if len(results) > self.max_size:
+                results.popitem(last=False)
+        return value
+
+    def key(self, args):
+        # By content, and by Python type so 1 and 1.0 stay apart
+        key = []
+        for arg in args:
+            if type(arg) is not Number and type(arg) is not String:
+                return None
+            key.append((type(arg.value), arg.value))
+        return tuple(key)
+
+    def __repr__(self):
+        return f"<memoized function {self.name}>"
+
+
 class BuiltInFunction(BaseFunction):
+    __slots__ = ()
+
     def __init__(self, name):
-        super().__init__()
         self.name = name or "<anonymous>"
 
-    def execute(self, args):
-        res = RTResult()
-        exe_ctx = self.generate_new_context()
+    def execute(self, args, context, call_span):
+        exe_ctx = self.generate_new_context(context, call_span)
         method_name = f'execute_{self.name}'
         method = getattr(self, method_name, self.no_visit_method)
-        res.register(self.check_and_populate_args(method.arg_names, args, exe_ctx))
-        if res.error: return res
-        return_value = res.register(method(exe_ctx))
-        if res.error: return res
-        return res.success(return_value)
+        self.check_and_populate_args(method.arg_names, args, exe_ctx, call_span)
+        try:
+            return method(exe_ctx)
+        except RTError as error:
+            # Builtins raise their errors without a location, the call site is it
+            if error.context is None:
+                error.set_context(context)
+            raise error.set_pos(call_span.pos_start, call_span.pos_end)
 
     def no_visit_method(self, node, context):
         raise Exception(f'No execute_{self.name} method defined')
 
-    def copy(self):
-        copy = BuiltInFunction(self.name)
-        copy.set_context(self.context)
-        copy.set_pos(self.pos_start, self.pos_end)
-        return copy
-
     def execute_print(self, exec_ctx):
         print(str(exec_ctx.symbol_table.get('value')))
-        return RTResult().success(Number.null)
+        return Number.null
 
     execute_print.arg_names = ['value']
 
     def execute_print_ret(self, exec_ctx):
-        return RTResult().success(str(exec_ctx.symbol_table.get('value')))
+        return str(exec_ctx.symbol_table.get('value'))
 
     execute_print_ret.arg_names = ['value']
 
     def execute_input(self, exec_ctx):
         text = input()
-        return RTResult().success(String(text))
+        return String(text)
 
     execute_input.arg_names = []
 
@@ -278,39 +328,39 @@ class BuiltInFunction(BaseFunction):
             try:
                 number = int(text)
                 break
-            except:
+            except ValueError:
                 pass
-        return RTResult().success(Number(number))
+        return Number(number)
 
     execute_input_int.arg_names = []
 
     def execute_clear(self, exec_ctx):
         os.system('cls' if os.name == 'nt' else 'clear')
-        return RTResult().success(Number.null)
+        return Number.null
 
     execute_clear.arg_names = []
 
     def execute_is_number(self, exec_ctx):
         is_number = isinstance(exec_ctx.symbol_table.get('value'), Number)
-        return RTResult().success(Number.true if is_number else Number.false)
+        return Number.true if is_number else Number.false
 
     execute_is_number.arg_names = ['value']
 
     def execute_is_string(self, exec_ctx):
         is_string = isinstance(exec_ctx.symbol_table.get('value'), String)
-        return RTResult().success(Number.true if is_string else Number.false)
+        return Number.true if is_string else Number.false
 
     execute_is_string.arg_names = ['value']
 
     def execute_is_list(self, exec_ctx):
         is_list = isinstance(exec_ctx.symbol_table.get('value'), ListValue)
-        return RTResult().success(Number.true if is_list else Number.false)
+        return Number.true if is_list else Number.false
 
     execute_is_list.arg_names = ['value']
 
     def execute_is_function(self, exec_ctx):
         is_function = isinstance(exec_ctx.symbol_table.get('value'), BaseFunction)
-        return RTResult().success(Number.true if is_function else Number.false)
+        return Number.true if is_function else Number.false
 
     execute_is_function.arg_names = ['value']
 
@@ -318,13 +368,13 @@ class BuiltInFunction(BaseFunction):
         list_ = exec_ctx.symbol_table.get('list')
         value = exec_ctx.symbol_table.get('value')
         if not isinstance(list_, ListValue):
-            return RTResult().failure(RTError(
-                self.pos_start, self.pos_end,
+            raise RTError(
+                None, None,
                 "First argument must be list",
                 exec_ctx
-            ))
-        list_.elements.append(value)
-        return RTResult().success(Number.null)
+            )
+        list_.append(value)
+        return Number.null
 
     execute_append.arg_names = ['list', 'value']
 
@@ -332,26 +382,26 @@ class BuiltInFunction(BaseFunction):
         list_ = exec_ctx.symbol_table.get('list')
         index = exec_ctx.symbol_table.get('index')
         if not isinstance(list_, ListValue):
-            return RTResult().failure(RTError(
-                self.pos_start, self.pos_end,
+            raise RTError(
+                None, None,
                 "First argument must be list",
                 exec_ctx
-            ))
+            )
         if not isinstance(index, Number):
-            return RTResult().failure(RTError(
-                self.pos_start, self.pos_end,
+            raise RTError(
+                None, None,
                 "Second argument must be number",
                 exec_ctx
-            ))
+            )
         try:
-            element = list_.elements.pop(index.value)
-        except:
-            return RTResult().failure(RTError(
-                self.pos_start, self.pos_end,
+            element = list_.pop(index.value)
+        except (IndexError, TypeError):
+            raise RTError(
+                None, None,
                 "Element at index could not be removed from list, either because index is out of bounds or the list is empty",
                 exec_ctx
-            ))
-        return RTResult().success(element)
+            )
+        return element
 
     execute_pop.arg_names = ['list', 'index']
 
@@ -359,67 +409,159 @@ class BuiltInFunction(BaseFunction):
         list_a = exec_ctx.symbol_table.get('list_a')
         list_b = exec_ctx.symbol_table.get('list_b')
         if not isinstance(list_a, ListValue):
-            return RTResult().failure(RTError(
-                self.pos_start, self.pos_end,
+            raise RTError(
+                None, None,
                 "First argument must be list",
                 exec_ctx
-            ))
+            )
         if not isinstance(list_b, ListValue):
-            return RTResult().failure(RTError(
-                self.pos_start, self.pos_end,
+            raise RTError(
+                None, None,
                 "Second argument must be list",
                 exec_ctx
-            ))
-        list_a.elements.extend(list_b.elements)
-        return RTResult().success(Number.null)
+            )
+        list_a.extend(list_b)
+        return Number.null
 
     execute_extend.arg_names = ['list_a', 'list_b']
 
+    def numbers_arg(self, exec_ctx, name, description):
+        list_ = exec_ctx.symbol_table.get(name)
+        numbers = list_.numbers() if isinstance(list_, ListValue) else None
+        if numbers is None:
+            raise RTError(
+                None, None,
+                f"{description} must be list of numbers",
+                exec_ctx
+            )
+        return numbers
+
+    def numbers_args(self, exec_ctx):
+        numbers_a = self.numbers_arg(exec_ctx, 'list_a', "First argument")
+        numbers_b = self.numbers_arg(exec_ctx, 'list_b', "Second argument")
+        if len(numbers_a) != len(numbers_b):
+            raise RTError(
+                None, None,
+                "Lists must have the same length",
+                exec_ctx
+            )
+        return numbers_a, numbers_b
+
+    def execute_vec_add(self, exec_ctx):
+        numbers_a, numbers_b = self.numbers_args(exec_ctx)
+        return ListValue.from_numbers(list(map(operator.add, numbers_a, numbers_b)))
+
+    execute_vec_add.arg_names = ['list_a', 'list_b']
+
+    def execute_vec_mul(self, exec_ctx):
+        numbers_a, numbers_b = self.numbers_args(exec_ctx)
+        return ListValue.from_numbers(list(map(operator.mul, numbers_a, numbers_b)))
+
+    execute_vec_mul.arg_names = ['list_a', 'list_b']
+
+    def execute_dot(self, exec_ctx):
+        numbers_a, numbers_b = self.numbers_args(exec_ctx)
+        return Number(sum(map(operator.mul, numbers_a, numbers_b)))
+
+    execute_dot.arg_names = ['list_a', 'list_b']
+
+    def execute_sum(self, exec_ctx):
+        return Number(sum(self.numbers_arg(exec_ctx, 'list', "Argument")))
+
+    execute_sum.arg_names = ['list']
+
+    def execute_min(self, exec_ctx):
+        numbers = self.numbers_arg(exec_ctx, 'list', "Argument")
+        if not numbers:
+            raise RTError(None, None, "List is empty", exec_ctx)
+        return Number(min(numbers))
+
+    execute_min.arg_names = ['list']
+
+    def execute_max(self, exec_ctx):
+        numbers = self.numbers_arg(exec_ctx, 'list', "Argument")
+        if not numbers:
+            raise RTError(None, None, "List is empty", exec_ctx)
+        return Number(max(numbers))
+
+    execute_max.arg_names = ['list']
+
+    def execute_memo(self, exec_ctx):
+        function = exec_ctx.symbol_table.get('function')
+        if isinstance(function, MemoFunction):
+            return function
+        if not isinstance(function, Function):
+            raise RTError(
+                None, None,
+                "Argument must be a function",
+                exec_ctx
+            )
+        if not function.is_pure():
+            raise RTError(
+                None, None,
+                f"'{function.name}' is not pure, its results cannot be memoized",
+                exec_ctx
+            )
+        return MemoFunction(function)
+
+    execute_memo.arg_names = ['function']
+
+    def execute_memo_info(self, exec_ctx):
+        function = exec_ctx.symbol_table.get('function')
+        if not isinstance(function, MemoFunction):
+            raise RTError(
+                None, None,
+                "Argument must be a memoized function",
+                exec_ctx
+            )
+        return ListValue([Number(function.hits), Number(function.misses), Number(len(function.results))])
+
+    execute_memo_info.arg_names = ['function']
+
     def __repr__(self):
         return f"<built-in function {self.name}>"
 
 
-BuiltInFunction.print = BuiltInFunction("print")
-BuiltInFunction.print_ret = BuiltInFunction("print_ret")
-BuiltInFunction.input = BuiltInFunction("input")
-BuiltInFunction.input_int = BuiltInFunction("input_int")
-BuiltInFunction.clear = BuiltInFunction("clear")
-BuiltInFunction.is_number = BuiltInFunction("is_number")
-BuiltInFunction.is_string = BuiltInFunction("is_string")
-BuiltInFunction.is_list = BuiltInFunction("is_list")
-BuiltInFunction.is_function = BuiltInFunction("is_function")
-BuiltInFunction.append = BuiltInFunction("append")
-BuiltInFunction.pop = BuiltInFunction("pop")
-BuiltInFunction.extend = BuiltInFunction("extend")
+class String(Value):
+    __slots__ = ('value',)
 
+    # Strings from literals, one object per text. It outlives every run, so
+    # is bounded by INTERN_SIZE. A hit doesn't reorder it, which could race
+    # with another thread dropping the same text.
+    interned = OrderedDict()
 
-class String(Value):
     def __init__(self, value):
-        super().__init__()
         self.value = value
 
+    @classmethod
+    def intern(cls, value):
+        interned = cls.interned
+        string = interned.get(value)
+        if string is None:
+            string = interned[value] = cls(value)
+            if len(interned) > INTERN_SIZE:
+                interned.popitem(last=False)
+        return string
+
     def added_to(self, other):
         if isinstance(other, String):
-            return String(self.value + other.value).set_context(self.context).set_pos(self.pos_start,
-                                                                                      other.pos_end), None
+            if active.budget:
+                active.budget.allocate(len(self.value) + len(other.value))
+            return String(self.value + other.value)
         else:
-            return None, Value.illegal_operation(self, other)
+            raise self.illegal_operation(other)
 
     def multed_by(self, other):
         if isinstance(other, Number):
-            return String(self.value * other.value).set_context(self.context).set_pos(self.pos_start,
-                                                                                      other.pos_end), None
+            if active.budget and isinstance(other.value, int):
+                active.budget.allocate(len(self.value) * max(other.value, 0))
+            return String(self.value * other.value)
         else:
-            return None, Value.illegal_operation(self, other)
+            raise self.illegal_operation(other)
 
     def is_true(self):
         return len(self.value) > 0
 
-    def copy(self):
-        copy = String(self.value)
-        copy.set_context(self.context)
-        copy.set_pos(self.pos_start, self.pos_end)
-        return copy
     def __str__(self):
         return self.value
 
@@ -428,274 +570,496 @@ class String(Value):
 
 
 class ListValue(Value):
-    def __init__(self, elements):
-        super().__init__()
+    # Long lists of numbers of one kind keep the bare values in an array and
+    # box them again as they are read. Anything else, or a value the array
+    # can't hold, puts the list back into a list of values.
+    #
+    # Copies share the buffer and see its first size elements. Appending to
+    # the list that ends where the buffer does happens in place, the others
+    # never look that far. Any other change first takes a private buffer.
+    __slots__ = ('elements', 'size', 'shared')
+
+    def __init__(self, elements, size=None):
         self.elements = elements
+        self.size = len(elements) if size is None else size
+        self.shared = False
+        if size is None and self.size >= COMPACT_SIZE and type(elements) is list:
+            self.compact()
+
+    @classmethod
+    def from_numbers(cls, numbers):
+        if active.budget:
+            active.budget.allocate(len(numbers))
+        kinds = set(map(type, numbers))
+        if len(numbers) >= COMPACT_SIZE and len(kinds) == 1:
+            try:
+                return cls(array(ARRAY_TYPECODES[kinds.pop()], numbers))
+            except OverflowError:
+                pass
+        return cls([number(x) for x in numbers])
+
+    def compact(self):
+        elements = self.view()
+        kind = type(elements[0].value) if type(elements[0]) is Number else None
+        if kind not in ARRAY_TYPECODES:
+            return
+        for element in elements:
+            if type(element) is not Number or type(element.value) is not kind:
+                return
+        try:
+            self.elements = array(ARRAY_TYPECODES[kind], [element.value for element in elements])
+        except OverflowError:
+            return
+        self.shared = False
+
+    def expand(self):
+        if type(self.elements) is not list:
+            if active.budget:
+                active.budget.allocate(self.size)
+            self.elements = [number(x) for x in self.view()]
+            self.shared = False
+        return self.elements
+
+    def own(self):
+        if self.shared or self.size != len(self.elements):
+            # The copy is an allocation of its own
+            if active.budget:
+                active.budget.allocate(self.size)
+            self.elements = self.elements[:self.size]
+            self.shared = False
+        return self.elements
+
+    def view(self):
+        # The buffer as this list sees it, bare values when it is an array
+        if self.size == len(self.elements):
+            return self.elements
+        return self.elements[:self.size]
+
+    def values(self):
+        if type(self.elements) is list:
+            return self.view()
+        return [number(x) for x in self.view()]
+
+    def numbers(self):
+        # The bare values when every element is a number, else None
+        elements = self.view()
+        if type(elements) is not list:
+            return elements
+        for element in elements:
+            if type(element) is not Number:
+                return None
+        return [element.value for element in elements]
+
+    def get(self, index):
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        element = self.elements[index]
+        return element if type(self.elements) is list else number(element)
+
+    def append(self, value):
+        if active.budget:
+            active.budget.allocate(1)
+        elements = self.elements
+        if self.size != len(elements):
+            elements = self.own()
+        if type(elements) is list:
+            elements.append(value)
+            self.size += 1
+            if self.size == COMPACT_SIZE:
+                self.compact()
+            return
+        if type(value) is Number and ARRAY_TYPECODES.get(type(value.value)) == elements.typecode:
+            try:
+                elements.append(value.value)
+                self.size += 1
+                return
+            except OverflowError:
+                pass
+        self.expand().append(value)
+        self.size += 1
+
+    def extend(self, other):
+        if active.budget:
+            active.budget.allocate(other.size)
+        values = other.values()
+        elements = self.elements
+        if self.size != len(elements):
+            elements = self.own()
+        if type(elements) is not list:
+            for value in values:
+                self.append(value)
+            return
+        size = self.size
+        elements.extend(values)
+        self.size = len(elements)
+        if size < COMPACT_SIZE <= self.size:
+            self.compact()
+
+    def pop(self, index):
+        elements = self.own()
+        element = elements.pop(index)
+        self.size -= 1
+        return element if type(elements) is list else number(element)
 
     def added_to(self, other):
         new_list = self.copy()
-        new_list.elements.append(other)
-        return new_list, None
+        new_list.append(other)
+        return new_list
 
     def multed_by(self, other):
         if isinstance(other, ListValue):
             new_list = self.copy()
-            new_list.elements.extend(other.elements)
-            return new_list, None
+            new_list.extend(other)
+            return new_list
         else:
-            return None, Value.illegal_operation(self, other)
+            raise self.illegal_operation(other)
 
     def subbed_by(self, other):
         if isinstance(other, Number):
             try:
                 new_list = self.copy()
-                new_list.elements.pop(other.value)
-                return new_list, None
-            except:
-                return None, RTError(
-                    other.pos_start, other.pos_end,
+                new_list.pop(other.value)
+                return new_list
+            except (IndexError, TypeError):
+                raise RTError(
+                    None, None,
                     "Element at this index could not be removed from list, because index is out of bounds",
-                    self.context
+                    None
                 )
         else:
-            return None, Value.illegal_operation(self, other)
+            raise self.illegal_operation(other)
 
     def dived_by(self, other):
         if isinstance(other, Number):
             try:
-                return self.elements[other.value], None
-            except:
-                return None, RTError(
-                    other.pos_start, other.pos_end,
+                return self.get(other.value)
+            except (IndexError, TypeError):
+                raise RTError(
+                    None, None,
                     "Element at this index could not be retrieved from list, because index is out of bounds",
-                    self.context
+                    None
                 )
         else:
-            return None, Value.illegal_operation(self, other)
+            raise self.illegal_operation(other)
 
     def copy(self):
-        copy = ListValue(self.elements)
-        copy.set_context(self.context)
-        copy.set_pos(self.pos_start, self.pos_end)
-        return copy
+        self.shared = True
+        new_list = ListValue(self.elements, self.size)
+        new_list.shared = True
+        return new_list
 
     def __str__(self):
-        return f"{', '.join([str(x) for x in self.elements])}"
+        return f"{', '.join([str(x) for x in self.view()])}"
 
     def __repr__(self):
-        return f"[{', '.join([str(x) for x in self.elements])}]"
+        return f"[{', '.join([str(x) for x in self.view()])}]"
+
+
+class Pool(threading.local):
+    # Contexts of calls that returned, reused by the next calls on the same
+    # thread. A call that raises keeps its context, the error's traceback
+    # still walks it.
+    def __init__(self):
+        self.free = []
+
+
+pool = Pool()
 
 
 class Context:
-    def __init__(self, display_name, parent=None, parent_entry_pos=None):
+    __slots__ = ('display_name', 'parent', 'parent_entry_span', 'symbol_table')
+
+    def __init__(self, display_name, parent=None, parent_entry_span=None):
         self.display_name = display_name
         self.parent = parent
-        self.parent_entry_pos = parent_entry_pos
+        self.parent_entry_span = parent_entry_span
         self.symbol_table = None
 
+    @property
+    def parent_entry_pos(self):
+        return self.parent_entry_span.pos_start if self.parent_entry_span else None
+
+    @classmethod
+    def enter(cls, display_name, parent, call_span, symbols, slots):
+        free = pool.free
+        if free:
+            context = free.pop()
+            context.display_name = display_name
+            context.parent = parent
+            context.parent_entry_span = call_span
+            symbol_table = context.symbol_table
+            symbol_table.symbols = symbols
+            symbol_table.slots = slots
+            symbol_table.shared = True
+            symbol_table.parent = parent.symbol_table
+        else:
+            context = cls(display_name, parent, call_span)
+            context.symbol_table = SymbolTable(parent.symbol_table, symbols, slots)
+        return context
+
+    def release(self):
+        self.parent = self.parent_entry_span = None
+        symbol_table = self.symbol_table
+        symbol_table.parent = symbol_table.symbols = symbol_table.slots = None
+        pool.free.append(self)
+
 
 class SymbolTable:
-    def __init__(self, parent=None):
-        self.symbols = {}
+    __slots__ = ('symbols', 'slots', 'shared', 'parent', 'function_locals')
+
+    def __init__(self, parent=None, symbols=None, slots=None):
+        # symbols maps each name to its index in slots; tables for compiled
+        # functions share one precomputed index and start with every slot empty
+        self.symbols = {} if symbols is None else symbols
+        self.slots = [] if slots is None else slots
+        self.shared = symbols is not None
         self.parent = parent
+        # On global tables, the names compiled functions run against it keep local
+        self.function_locals = None
 
     def get(self, name):
-        value = self.symbols.get(name, None)
+        index = self.symbols.get(name)
+        value = None if index is None else self.slots[index]
         if value is None and self.parent:
             return self.parent.get(name)
         return value
 
     def set(self, name, value):
-        self.symbols[name] = value
+        self.slots[self.index_of(name)] = value
+
+    def index_of(self, name):
+        index = self.symbols.get(name)
+        if index is None:
+            if self.shared:
+                self.symbols = dict(self.symbols)
+                self.shared = False
+            index = len(self.slots)
+            self.symbols[name] = index
+            self.slots.append(None)
+        return index
 
     def remove(self, name):
-        del self.symbols[name]
+        self.slots[self.symbols[name]] = None
+
+    def add_function_locals(self, names):
+        # A new set rather than a changed one, so links made before it are redone
+        function_locals = self.function_locals or frozenset()
+        if not names <= function_locals:
+            self.function_locals = function_locals | names
+
+    def clone(self):
+        # The same values in new slots. Both tables keep using the one dict
+        # of names until either adds a name.
+        self.shared = True
+        return SymbolTable(self.parent, self.symbols, list(self.slots))
 
 
 class Interpreter:
+    __slots__ = ()
+
+    # node type -> visit function, filled as node types are first seen
+    visitors = {}
+
+    def run(self, node, context):
+        # Interprets a whole program, functions builtins call run here too
+        previous, running.interpreter = running.interpreter, self
+        try:
+            return self.interpret(node, context)
+        finally:
+            running.interpreter = previous
 
     def interpret(self, node, context):
-        method_name = f'visit_{type(node).__name__}'
-        method = getattr(self, method_name, self.no_visit_method)
-        return method(node, context)
+        visit = self.visitors.get(type(node)) or self.add_visitor(type(node))
+        return visit(self, node, context)
+
+    def add_visitor(self, node_type):
+        visit = getattr(Interpreter, f'visit_{node_type.__name__}', Interpreter.no_visit_method)
+        Interpreter.visitors[node_type] = visit
+        return visit
 
     def no_visit_method(self, node, context):
         raise Exception(f'No visit_{type(node).__name__} method defined')
 
+    def discard(self, node, context):
+        # Evaluate node only for its effects: a block of statements runs
+        # without collecting their values into a list
+        if type(node) is ListNode:
+            for element_node in node.element_nodes:
+                self.interpret(element_node, context)
+        else:
+            self.interpret(node, context)
+
     def visit_VarAccessNode(self, node, context):
-        res = RTResult()
         var_name = node.var_name_token.value
         value = context.symbol_table.get(var_name)
         if not value:
-            return res.failure(RTError(
+            raise RTError(
                 node.pos_start, node.pos_end,
                 f"'{var_name}' is not defined",
                 context
-            ))
-        value = value.copy().set_context(context).set_pos(node.pos_start, node.pos_end)
-        return res.success(value)
+            )
+        return value
 
     def visit_StringNode(self, node, context):
-        return RTResult().success(
-            String(node.token.value).set_context(context).set_pos(node.pos_start, node.pos_end)
-        )
+        return String.intern(node.token.value)
 
     def visit_IfNode(self, node, context):
-        res = RTResult()
         for condition, expr, should_return_null in node.cases:
-            condition_value = res.register(self.interpret(condition, context))
-            if res.error:
-                return res
+            condition_value = self.interpret(condition, context)
             if condition_value.value:
-                expr_value = res.register(self.interpret(expr, context))
-                if res.error:
-                    return res
-                return res.success(Number.null if should_return_null else expr_value)
+                if should_return_null:
+                    self.discard(expr, context)
+                    return Number.null
+                return self.interpret(expr, context)
         if node.else_case:
             expr, should_return_null = node.else_case
-            else_value = res.register(self.interpret(expr, context))
-            if res.error:
-                return res
-            return res.success(Number.null if should_return_null else else_value)
-        return res.success(Number.null)
+            if should_return_null:
+                self.discard(expr, context)
+                return Number.null
+            return self.interpret(expr, context)
+        return Number.null
 
     def visit_ListNode(self, node, context):
-        res = RTResult()
         elements = []
         for element_node in node.element_nodes:
-            elements.append(res.register(self.interpret(element_node, context)))
-            if res.error:
-                return res
-        return res.success(
-            ListValue(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
-        )
+            elements.append(self.interpret(element_node, context))
+        return ListValue(elements)
 
     def visit_VarAssignNode(self, node, context):
-        res = RTResult()
         var_name = node.var_name_token.value
-        value = res.register(self.interpret(node.value_node, context))
-        if res.error:
-            return res
+        value = self.interpret(node.value_node, context)
         context.symbol_table.set(var_name, value)
-        return res.success(value)
+        return value
 
     def visit_NumberNode(self, node, context):
-
-        return RTResult().success(
-            Number(node.token.value).set_context(context).set_pos(node.token.pos_start, node.token.pos_end))
+        return number(node.token.value)
 
     def visit_BinOpNode(self, node, context):
-        res = RTResult()
-        left = res.register(self.interpret(node.left_node, context))
-        if res.error: return res
-        right = res.register(self.interpret(node.right_node, context))
-        if res.error: return res
-        if node.op_token.type == TokenType.PLUS:
-            result, error = left.added_to(right)
-        elif node.op_token.type == TokenType.MINUS:
-            result, error = left.subbed_by(right)
-        elif node.op_token.type == TokenType.MULTIPLY:
-            result, error = left.multed_by(right)
-        elif node.op_token.type == TokenType.DIVIDE:
-            result, error = left.dived_by(right)
-        elif node.op_token.type == TokenType.EEQ:
-            result, error = left.eq(right)
-        elif node.op_token.type == TokenType.NE:
-            result, error = left.neq(right)
-        elif node.op_token.type == TokenType.LT:
-            result, error = left.lt(right)
-        elif node.op_token.type == TokenType.GT:
-            result, error = left.gt(right)
-        elif node.op_token.type == TokenType.LTE:
-            result, error = left.lte(right)
-        elif node.op_token.type == TokenType.GTE:
-            result, error = left.gte(right)
-        elif node.op_token.matches(TokenType.KEYWORD, 'AND'):
-            result, error = left.and_(right)
-        elif node.op_token.matches(TokenType.KEYWORD, 'OR'):
-            result, error = left.or_(right)
-        if error:
-            return res.failure(error)
-        return res.success(result.set_pos(node.pos_start, node.pos_end))
+        left = self.interpret(node.left_node, context)
+        right = self.interpret(node.right_node, context)
+        operation = node.operation
+        if type(left) is operation.left_type and type(right) is operation.right_type:
+            function = operation.function
+        else:
+            function = operation.resolve(type(left), type(right))
+        try:
+            return function(left, right)
+        except RTError as error:
+            span = value_node(node.right_node)
+            raise error.set_pos(span.pos_start, span.pos_end).set_context(context)
 
     def visit_ForNode(self, node, context):
-        res = RTResult()
-        elements = []
-        start = res.register(self.interpret(node.start_value_node, context))
-        if res.error: return res
-        end = res.register(self.interpret(node.end_value_node, context))
-        if res.error: return res
-        context.symbol_table.set(node.var_name_tok.value, Number(start))
-        step = res.register(
-            self.interpret(node.step_value_node, context) if node.step_value_node else RTResult().success(Number(1)))
-        if res.error: return res
-        final_res = None
-        print(start, end, step)
+        start = self.interpret(node.start_value_node, context)
+        end = self.interpret(node.end_value_node, context)
+        step = self.interpret(node.step_value_node, context) if node.step_value_node else number(1)
+        # Look the loop variable's slot up once and store straight into it
+        var_name = node.var_name_tok.value
+        symbol_table = context.symbol_table
+        index = symbol_table.index_of(var_name)
+        slots = symbol_table.slots
+        body_node = node.body_value_node
+        budget = active.budget
+        cost = budget.cost(body_node) if budget else 0
+        if node.should_return_null:
+            statements = [(self.visitors.get(type(statement)) or self.add_visitor(type(statement)), statement)
+                          for statement in body_node.element_nodes]
+            for x in range(start.value, end.value, step.value):
+                if budget:
+                    budget.charge(cost, node, context)
+                slots[index] = number(x)
+                for visit, statement in statements:
+                    visit(self, statement, context)
+            symbol_table.remove(var_name)
+            return Number.null
+        visit = self.visitors.get(type(body_node)) or self.add_visitor(type(body_node))
+        elements = ListValue([])
+        append = elements.append
         for x in range(start.value, end.value, step.value):
-            context.symbol_table.set(node.var_name_tok.value, Number(x))
-            final_res = res.register(self.interpret(node.body_value_node, context))
-            elements.append(final_res)
-            if res.error: return res
-        context.symbol_table.remove(node.var_name_tok.value)
-        return res.success(
-            Number.null if node.should_return_null else
-            ListValue(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
-        )
+            if budget:
+                budget.charge(cost, node, context)
+            slots[index] = number(x)
+            append(visit(self, body_node, context))
+        symbol_table.remove(var_name)
+        return elements
 
     def visit_WhileNode(self, node, context):
-        res = RTResult()
-        val = res.register(self.interpret(node.condition_node, context))
-        if res.error: return res
-        final_res = None
+        val = self.interpret(node.condition_node, context)
         elements = []
+        budget = active.budget
+        cost = budget.cost(node) if budget else 0
         while val.value:
-            final_res = res.register(self.interpret(node.body_node, context))
-            if res.error: return res
-            val = res.register(self.interpret(node.condition_node, context))
+            if budget:
+                budget.charge(cost, node, context)
+            self.discard(node.body_node, context)
+            val = self.interpret(node.condition_node, context)
             elements.append(val)
-        return res.success(
-            Number.null if node.should_return_null else
-            ListValue(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
-        )
+        return Number.null if node.should_return_null else ListValue(elements)
 
     def visit_FuncDefNode(self, node, context):
-        res = RTResult()
         func_name = node.var_name_tok.value if node.var_name_tok else None
         body_node = node.body_node
         arg_names = [arg_name.value for arg_name in node.arg_name_toks]
-        func_value = Function(func_name, body_node, arg_names, node.should_return_null).set_context(context).set_pos(node.pos_start,
-                                                                                            node.pos_end)
+        func_value = Function(func_name, body_node, arg_names, node.should_return_null)
         if node.var_name_tok:
             context.symbol_table.set(func_name, func_value)
-        return res.success(func_value)
+        return func_value
 
     def visit_CallNode(self, node, context):
-        res = RTResult()
         args = []
-        value_to_call = res.register(self.interpret(node.node_to_call, context))
-        if res.error:
-            return res
-        value_to_call = value_to_call.copy().set_pos(node.pos_start, node.pos_end)
+        value_to_call = self.interpret(node.node_to_call, context)
         for arg_node in node.arg_nodes:
-            args.append(res.register(self.interpret(arg_node, context)))
-            if res.error:
-                return res
-        return_value = res.register(value_to_call.execute(args))
-        if res.error: return res
-        return_value = return_value.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
-        return res.success(return_value)
+            args.append(self.interpret(arg_node, context))
+        if type(value_to_call) is Function:
+            return self.call(value_to_call, args, context, node)
+        return value_to_call.execute(args, context, node)
+
+    def call(self, function, args, context, call_span):
+        # args becomes the slots of the call's symbol table
+        if len(args) != len(function.arg_names):
+            function.check_args(function.arg_names, args, context, call_span)
+        budget = active.budget
+        if budget:
+            budget.charge(budget.cost(function.body_node), call_span, context)
+        exec_context = Context.enter(function.name, context, call_span, function.arg_index, args)
+        try:
+            if function.should_return_null:
+                self.discard(function.body_node, exec_context)
+                value = Number.null
+            else:
+                value = self.interpret(function.body_node, exec_context)
+        except RecursionError:
+            # Each call here nests Python calls, the VM goes much deeper
+            raise RTError(
+                call_span.pos_start, call_span.pos_end,
+                "Maximum recursion depth exceeded",
+                context
+            )
+        exec_context.release()
+        return value
 
     def visit_UnaryOpNode(self, node, context):
-        res = RTResult()
-        number = res.register(self.interpret(node.node, context))
-        if res.error: return res
-        error = None
-        if node.op_token.type == TokenType.MINUS:
-            number, error = number.multed_by(Number(-1))
-        elif node.op_token.matches(TokenType.KEYWORD, 'NOT'):
-            number, error = number.notted()
-
-        if error:
-            return res.failure(error)
+        value = self.interpret(node.node, context)
+        operation = node.operation
+        if operation is None:
+            return value
+        if type(value) is operation.left_type:
+            function = operation.function
         else:
-            return res.success(number.set_pos(node.pos_start, node.pos_end))
+            function = operation.resolve(type(value))
+        try:
+            return function(value)
+        except RTError as error:
+            raise error.set_pos(node.node.pos_start, node.node.pos_end).set_context(context)
+
+
+Interpreter.shared = Interpreter()
+
+
+class Running(threading.local):
+    # The interpreter of the run in progress on this thread
+    interpreter = Interpreter.shared
+
+
+running = Running()
@@ -1,6 +1,8 @@
+import re
+
 from interpreter import KEYWORDS
 from error import IllegalCharError, ExpectedCharError
-from position import Position
+from position import Position, EndPosition, Source
 from token_ import Token, TokenType
 
 
@@ -8,21 +10,22 @@ class Lexer:
     def __init__(self, filename, text):
         self.filename = filename
         self.text = text
-        self.pos = Position(-1, 0, -1, filename, text)
+        self.source = Source(filename, text)
+        self.index = -1
         self.current_char = None
         self.advance()
 
     def advance(self):
-        self.pos.advance()
-        if self.pos.index >= len(self.text):
+        self.index += 1
+        if self.index >= len(self.text):
             self.current_char = None
         else:
-            self.current_char = self.text[self.pos.index]
+            self.current_char = self.text[self.index]
 
     def make_number(self):
         num_str = ""
         dot_count = 0
-        pos_start = self.pos.copy()
+        start = self.index
         while self.current_char is not None and (self.current_char.isdigit() or self.current_char == "."):
             if self.current_char == ".":
                 if dot_count == 1:
@@ -32,9 +35,9 @@ class Lexer:
             self.advance()
 
         if dot_count == 0:
-            return Token(TokenType.INT, int(num_str), pos_start, self.pos)
+            return Token(TokenType.INT, int(num_str), start, self.index, self.source)
         else:
-            return Token(TokenType.FLOAT, float(num_str), pos_start, self.pos)
+            return Token(TokenType.FLOAT, float(num_str), start, self.index, self.source)
 
     def make_tokens(self):
         tokens = []
@@ -42,39 +45,39 @@ class Lexer:
             if self.current_char in " \t":
                 self.advance()
             elif self.current_char in ';\n':
-                tokens.append(Token(TokenType.NEWLINE, pos_start=self.pos))
+                tokens.append(Token(TokenType.NEWLINE, start=self.index, source=self.source))
                 self.advance()
             elif self.current_char.isdigit():
                 tokens.append(self.make_number())
             elif self.current_char.isalpha():
                 tokens.append(self.make_identifier())
             elif self.current_char == '+':
-                tokens.append(Token(TokenType.PLUS, pos_start=self.pos))
+                tokens.append(Token(TokenType.PLUS, start=self.index, source=self.source))
                 self.advance()
             elif self.current_char == '"':
                 tokens.append(self.make_string())
             elif self.current_char == '-':
                 tokens.append(self.make_minus_or_arrow())
             elif self.current_char == '*':
-                tokens.append(Token(TokenType.MULTIPLY, pos_start=self.pos))
+                tokens.append(Token(TokenType.MULTIPLY, start=self.index, source=self.source))
                 self.advance()
             elif self.current_char == '/':
-                tokens.append(Token(TokenType.DIVIDE, pos_start=self.pos))
+                tokens.append(Token(TokenType.DIVIDE, start=self.index, source=self.source))
                 self.advance()
             elif self.current_char == '(':
-                tokens.append(Token(TokenType.LPAREN, pos_start=self.pos))
+                tokens.append(Token(TokenType.LPAREN, start=self.index, source=self.source))
                 self.advance()
             elif self.current_char == ')':
-                tokens.append(Token(TokenType.RPAREN, pos_start=self.pos))
+                tokens.append(Token(TokenType.RPAREN, start=self.index, source=self.source))
                 self.advance()
             elif self.current_char == '[':
-                tokens.append(Token(TokenType.LSQAURE, pos_start=self.pos))
+                tokens.append(Token(TokenType.LSQAURE, start=self.index, source=self.source))
                 self.advance()
             elif self.current_char == ']':
-                tokens.append(Token(TokenType.RSQUARE, pos_start=self.pos))
+                tokens.append(Token(TokenType.RSQUARE, start=self.index, source=self.source))
                 self.advance()
             elif self.current_char == ',':
-                tokens.append(Token(TokenType.COMMA, pos_start=self.pos))
+                tokens.append(Token(TokenType.COMMA, start=self.index, source=self.source))
                 self.advance()
             elif self.current_char == '=':
                 tokens.append(self.make_equals())
@@ -88,66 +91,69 @@ class Lexer:
             elif self.current_char == '>':
                 tokens.append(self.make_greater_than())
             else:
-                pos_start = self.pos.copy()
+                start = self.index
                 char = self.current_char
                 self.advance()
-                return [], IllegalCharError(pos_start, self.pos, "'" + char + "'")
-        tokens.append(Token(TokenType.EOF, pos_start=self.pos))
+                return [], IllegalCharError(Position(self.source, start), EndPosition(self.source, self.index),
+                                            "'" + char + "'")
+        tokens.append(Token(TokenType.EOF, start=self.index, source=self.source))
         return tokens, None
 
     def make_identifier(self):
         id_str = ''
-        pos_start = self.pos.copy()
+        start = self.index
         while self.current_char is not None and (self.current_char.isalnum() or self.current_char == '_'):
             id_str += self.current_char
             self.advance()
         tok_type = TokenType.KEYWORD if id_str in KEYWORDS else TokenType.IDENTIFIER
-        return Token(tok_type, id_str, pos_start, self.pos)
+        return Token(tok_type, id_str, start, self.index, self.source)
 
     def make_not_equals(self):
-        pos_start = self.pos.copy()
+        start = self.index
         self.advance()
         if self.current_char == '=':
             self.advance()
-            return Token(TokenType.NE, pos_start=pos_start, pos_end=self.pos), None
+            return Token(TokenType.NE, None, start, self.index, self.source), None
         self.advance()
-        return None, ExpectedCharError(pos_start, self.pos, "Expected '=' after '!'")
+        return None, ExpectedCharError(Position(self.source, start), EndPosition(self.source, self.index),
+                                       "Expected '=' after '!'")
+
     def make_equals(self):
-        pos_start = self.pos.copy()
+        start = self.index
         self.advance()
         if self.current_char == '=':
             self.advance()
-            return Token(TokenType.EEQ, pos_start=pos_start, pos_end=self.pos)
-        return Token(TokenType.EQUALS, pos_start=pos_start, pos_end=self.pos)
+            return Token(TokenType.EEQ, None, start, self.index, self.source)
+        return Token(TokenType.EQUALS, None, start, self.index, self.source)
 
     def make_less_than(self):
-        pos_start = self.pos.copy()
+        start = self.index
         self.advance()
         if self.current_char == '=':
             self.advance()
-            return Token(TokenType.LTE, pos_start=pos_start, pos_end=self.pos)
-        return Token(TokenType.LT, pos_start=pos_start, pos_end=self.pos)
+            return Token(TokenType.LTE, None, start, self.index, self.source)
+        return Token(TokenType.LT, None, start, self.index, self.source)
 
     def make_greater_than(self):
-        pos_start = self.pos.copy()
+        start = self.index
         self.advance()
         if self.current_char == '=':
             self.advance()
-            return Token(TokenType.GTE, pos_start=pos_start, pos_end=self.pos)
-        return Token(TokenType.GT, pos_start=pos_start, pos_end=self.pos)
+            return Token(TokenType.GTE, None, start, self.index, self.source)
+        return Token(TokenType.GT, None, start, self.index, self.source)
 
     def make_minus_or_arrow(self):
         tok_type = TokenType.MINUS
-        pos_start = self.pos.copy()
+        start = self.index
         self.advance()
         if self.current_char == '>':
             self.advance()
             tok_type = TokenType.ARROW
-        return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
+        return Token(tok_type, None, start, self.index, self.source)
 
     def make_string(self):
         string = ''
-        pos_start = self.pos.copy()
+        start = self.index
         escape_character = False
         self.advance()
         escape_characters = {
@@ -166,6 +172,135 @@ class Lexer:
             self.advance()
             escape_character = False
         self.advance()
-        return Token(TokenType.STRING, string, pos_start, self.pos)
+        return Token(TokenType.STRING, string, start, self.index, self.source)
+
+
+class StreamScanner:
+    # Lexes lines as they are read, yielding the tokens of each before the
+    # next line is read. The lines go into one source until start_source()
+    # is called, after which the next line starts a new one.
+    def __init__(self, filename, lines):
+        self.filename = filename
+        self.lines = iter(lines)
+        self.line_number = 0
+        self.source = None
+
+    def start_source(self):
+        self.source = None
+
+    def tokens(self):
+        index = 0
+        for line in self.lines:
+            if self.source is None:
+                self.source = Source(self.filename, '', self.line_number)
+                index = 0
+            source = self.source
+            source.text += line
+            source.line_starts = None
+            self.line_number += line.count('\n')
+            tokens, error = Scanner(self.filename, source.text, source).make_tokens(index)
+            if error:
+                raise error
+            tokens.pop()
+            # A string left open may be closed on a later line
+            if tokens and tokens[-1].type == TokenType.STRING and tokens[-1].end > len(source.text):
+                tokens.pop()
+            for token in tokens:
+                yield token
+            index = tokens[-1].end if tokens else index
+        if self.source is None:
+            self.source = Source(self.filename, '', self.line_number)
+            index = 0
+        source = self.source
+        tokens, error = Scanner(self.filename, source.text, source).make_tokens(index)
+        if error:
+            raise error
+        yield from tokens
+
+
+TOKEN_PATTERN = re.compile(r"""
+    (?P<space>[ \t]+)
+  | (?P<newline>[;\n])
+  | (?P<number>\d+(?:\.\d*)?)
+  | (?P<identifier>[^\W\d_]\w*)
+  | (?P<string>"[^"]*"?)
+  | (?P<operator>->|==|!=|<=|>=|[-+*/()\[\],=<>])
+""", re.VERBOSE)
+
+OPERATOR_TYPES = {
+    '+': TokenType.PLUS,
+    '-': TokenType.MINUS,
+    '*': TokenType.MULTIPLY,
+    '/': TokenType.DIVIDE,
+    '(': TokenType.LPAREN,
+    ')': TokenType.RPAREN,
+    '[': TokenType.LSQAURE,
+    ']': TokenType.RSQUARE,
+    ',': TokenType.COMMA,
+    '=': TokenType.EQUALS,
+    '<': TokenType.LT,
+    '>': TokenType.GT,
+    '->': TokenType.ARROW,
+    '==': TokenType.EEQ,
+    '!=': TokenType.NE,
+    '<=': TokenType.LTE,
+    '>=': TokenType.GTE,
+}
 
 
+class Scanner:
+    def __init__(self, filename, text, source=None):
+        self.filename = filename
+        self.text = text
+        self.source = source or Source(filename, text)
+
+    def make_tokens(self, index=0):
+        text = self.text
+        source = self.source
+        length = len(text)
+        match = TOKEN_PATTERN.match
+        keywords = frozenset(KEYWORDS)
+        tokens = []
+        append = tokens.append
+        while index < length:
+            m = match(text, index)
+            if m is None:
+                return [], self.make_error(index)
+            kind = m.lastgroup
+            end = m.end()
+            if kind == 'space':
+                index = end
+                continue
+            if kind == 'identifier':
+                value = m.group()
+                tok_type = TokenType.KEYWORD if value in keywords else TokenType.IDENTIFIER
+                append(Token(tok_type, value, index, end, source))
+            elif kind == 'operator':
+                append(Token(OPERATOR_TYPES[m.group()], None, index, end, source))
+            elif kind == 'number':
+                value = m.group()
+                if '.' in value:
+                    append(Token(TokenType.FLOAT, float(value), index, end, source))
+                else:
+                    append(Token(TokenType.INT, int(value), index, end, source))
+            elif kind == 'newline':
+                append(Token(TokenType.NEWLINE, None, index, end, source))
+            else:
+                value = m.group()
+                if len(value) == 1 or value[-1] != '"':
+                    # An unterminated string also steps over the end of the text
+                    end += 1
+                    value = value[1:]
+                else:
+                    value = value[1:-1]
+                append(Token(TokenType.STRING, value.replace('\\', ''), index, end, source))
+            index = end
+        append(Token(TokenType.EOF, None, index, index + 1, source))
+        return tokens, None
+
+    def make_error(self, index):
+        char = self.text[index]
+        pos_start = self.source.position(index)
+        if char == '!':
+            return ExpectedCharError(pos_start, self.source.end_position(index + 2), "Expected '=' after '!'")
+        return IllegalCharError(pos_start, self.source.end_position(index + 1), "'" + char + "'")
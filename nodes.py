@@ -1,129 +1,211 @@
-class NumberNode:
+from operators import BINARY_OPERATORS, UNARY_OPERATORS, Operation, operator_name
+from position import Span
+from token_ import Token
+
+class NumberNode(Span):
+    __slots__ = ('token', 'source', 'start', 'end')
+
     def __init__(self, token):
         self.token = token
-        self.pos_start = self.token.pos_start
-        self.pos_end = self.token.pos_end
+        self.source = token.source
+        self.start = token.start
+        self.end = token.end
 
     def __repr__(self):
         return f"{self.token}"
 
-class StringNode:
+class StringNode(Span):
+    __slots__ = ('token', 'source', 'start', 'end')
+
     def __init__(self, token):
         self.token = token
-        self.pos_start = self.token.pos_start
-        self.pos_end = self.token.pos_end
+        self.source = token.source
+        self.start = token.start
+        self.end = token.end
 
     def __repr__(self):
         return f"{self.token}"
 
-class ListNode:
-    def __init__(self, element_nodes, pos_start, pos_end):
+class ListNode(Span):
+    __slots__ = ('element_nodes', 'source', 'start', 'end')
+
+    def __init__(self, element_nodes, start, end, source):
         self.element_nodes = element_nodes
-        self.pos_start = pos_start
-        self.pos_end = pos_end
+        self.source = source
+        self.start = start
+        self.end = end
     def __repr__(self):
         return f"[{self.element_nodes}]"
 
 
-class VarAccessNode:
+class VarAccessNode(Span):
+    __slots__ = ('var_name_token', 'source', 'start', 'end')
+
     def __init__(self, var_name_token):
         self.var_name_token = var_name_token
-        self.pos_start = self.var_name_token.pos_start
-        self.pos_end = self.var_name_token.pos_end
+        self.source = var_name_token.source
+        self.start = var_name_token.start
+        self.end = var_name_token.end
 
     def __repr__(self):
         return f"{self.var_name_token}"
 
 
-class VarAssignNode:
+class VarAssignNode(Span):
+    __slots__ = ('var_name_token', 'value_node', 'source', 'start', 'end')
+
     def __init__(self, var_name_token, value_node):
         self.var_name_token = var_name_token
         self.value_node = value_node
-        self.pos_start = self.var_name_token.pos_start
-        self.pos_end = self.value_node.pos_end if self.value_node.pos_end else self.var_name_token.pos_end
+        self.source = var_name_token.source
+        self.start = var_name_token.start
+        self.end = value_node.end
 
     def __repr__(self):
         return f"{self.var_name_token} = {self.value_node}"
 
 
-class BinOpNode:
+class BinOpNode(Span):
+    __slots__ = ('left_node', 'op_token', 'operation', 'right_node', 'source', 'start', 'end')
+
     def __init__(self, left_node, op_token, right_node):
         self.left_node = left_node
         self.op_token = op_token
+        self.operation = Operation(operator_name(BINARY_OPERATORS, op_token))
         self.right_node = right_node
-        self.pos_start = self.left_node.pos_start
-        self.pos_end = self.right_node.pos_end
+        self.source = left_node.source
+        self.start = left_node.start
+        self.end = right_node.end
 
     def __repr__(self):
         return f"({self.left_node}, {self.op_token}, {self.right_node})"
 
 
-class UnaryOpNode:
+class UnaryOpNode(Span):
+    __slots__ = ('op_token', 'operation', 'node', 'source', 'start', 'end')
+
     def __init__(self, op_token, node):
         self.op_token = op_token
+        operator = operator_name(UNARY_OPERATORS, op_token)
+        self.operation = Operation(operator) if operator else None
         self.node = node
-        self.pos_start = self.op_token.pos_start
-        self.pos_end = node.pos_end
+        self.source = op_token.source
+        self.start = op_token.start
+        self.end = node.end
 
     def __repr__(self):
         return f"({self.op_token}, {self.node})"
 
 
-class IfNode:
+class IfNode(Span):
+    __slots__ = ('cases', 'else_case', 'source', 'start', 'end')
+
     def __init__(self, cases, else_case=None):
 
         self.cases = cases
         self.else_case = else_case
-        self.pos_start = self.cases[0][0].pos_start
-        self.pos_end = (self.else_case if self.else_case else self.cases[-1])[0].pos_end
+        self.source = cases[0][0].source
+        self.start = cases[0][0].start
+        self.end = (else_case if else_case else cases[-1])[0].end
 
     def __repr__(self):
         return f"if {self.cases} else {self.else_case}"
 
-class ForNode:
+class ForNode(Span):
+    __slots__ = ('var_name_tok', 'start_value_node', 'end_value_node', 'step_value_node', 'body_value_node', 'source', 'start', 'end', 'should_return_null')
+
     def __init__(self, var_name_tok, start_value_node, end_value_node, step_value_node, body_value_node, should_return_null):
         self.var_name_tok = var_name_tok
         self.start_value_node = start_value_node
         self.end_value_node = end_value_node
         self.step_value_node = step_value_node
         self.body_value_node = body_value_node
-        self.pos_start = self.var_name_tok.pos_start
-        self.pos_end = self.body_value_node.pos_end
+        self.source = var_name_tok.source
+        self.start = var_name_tok.start
+        self.end = body_value_node.end
         self.should_return_null = should_return_null
 
     def __repr__(self):
         return f"for {self.var_name_tok} = {self.start_value_node} to {self.end_value_node} step {self.step_value_node} {self.body_value_node}"
 
 
-class WhileNode:
+class WhileNode(Span):
+    __slots__ = ('condition_node', 'body_node', 'source', 'start', 'end', 'should_return_null')
+
     def __init__(self, condition_node, body_node, should_return_null):
         self.condition_node = condition_node
         self.body_node = body_node
-        self.pos_start = self.condition_node.pos_start
-        self.pos_end = self.body_node.pos_end
+        self.source = condition_node.source
+        self.start = condition_node.start
+        self.end = body_node.end
         self.should_return_null = should_return_null
     def __repr__(self):
         return f"while {self.condition_node} {self.body_node}"
 
 
-class CallNode:
+class CallNode(Span):
+    __slots__ = ('node_to_call', 'arg_nodes', 'source', 'start', 'end')
+
     def __init__(self, node_to_call, arg_nodes):
         self.node_to_call = node_to_call
         self.arg_nodes = arg_nodes
-        self.pos_start = self.node_to_call.pos_start
-        self.pos_end = self.arg_nodes[-1].pos_end if self.arg_nodes else self.node_to_call.pos_end
+        self.source = node_to_call.source
+        self.start = node_to_call.start
+        self.end = arg_nodes[-1].end if arg_nodes else node_to_call.end
 
 
-class FuncDefNode:
+class FuncDefNode(Span):
+    __slots__ = ('var_name_tok', 'arg_name_toks', 'body_node', 'should_return_null', 'source', 'end', 'start')
+
     def __init__(self, var_name_tok, arg_name_toks, body_node, should_return_null):
         self.var_name_tok = var_name_tok
         self.arg_name_toks = arg_name_toks
         self.body_node = body_node
         self.should_return_null = should_return_null
+        self.source = body_node.source
         if self.var_name_tok:
-            self.pos_start = self.var_name_tok.pos_start
+            self.start = var_name_tok.start
         elif len(self.arg_name_toks) > 0:
-            self.pos_start = self.arg_name_toks[0].pos_start
+            self.start = arg_name_toks[0].start
         else:
-            self.pos_start = self.body_node.pos_start
-        self.pos_end = self.body_node.pos_end
\ No newline at end of file
+            self.start = body_node.start
+        self.end = body_node.end
+
+
+def value_node(node):
+    # The node that runtime errors about the value of this node point at
+    while isinstance(node, VarAssignNode):
+        node = node.value_node
+    return node
+
+
+# node type -> the slots of its classes that can hold other spans
+CHILD_SLOTS = {}
+
+
+def child_slots(node_type):
+    names = CHILD_SLOTS.get(node_type)
+    if names is None:
+        names = CHILD_SLOTS[node_type] = tuple(
+            name for cls in node_type.__mro__ for name in getattr(cls, '__slots__', ())
+            if name not in ('source', 'start', 'end'))
+    return names
+
+
+def children(node):
+    for name in child_slots(type(node)):
+        value = getattr(node, name, None)
+        for item in value if isinstance(value, (list, tuple)) else (value,):
+            for child in item if isinstance(item, tuple) else (item,):
+                if isinstance(child, Span) and not isinstance(child, Token):
+                    yield child
+
+
+def count_nodes(node):
+    count = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(children(node))
+    return count
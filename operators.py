@@ -0,0 +1,90 @@
+from error import RTError
+from token_ import TokenType
+
+BINARY_OPERATORS = {
+    TokenType.PLUS: 'added_to',
+    TokenType.MINUS: 'subbed_by',
+    TokenType.MULTIPLY: 'multed_by',
+    TokenType.DIVIDE: 'dived_by',
+    TokenType.EEQ: 'eq',
+    TokenType.NE: 'neq',
+    TokenType.LT: 'lt',
+    TokenType.GT: 'gt',
+    TokenType.LTE: 'lte',
+    TokenType.GTE: 'gte',
+    (TokenType.KEYWORD, 'AND'): 'and_',
+    (TokenType.KEYWORD, 'OR'): 'or_',
+}
+
+UNARY_OPERATORS = {
+    TokenType.PLUS: None,
+    TokenType.MINUS: 'negated',
+    (TokenType.KEYWORD, 'NOT'): 'notted',
+}
+
+# (operator, left type, right type) -> function, filled in the first time a
+# combination is evaluated. Unary operations use None as the right type.
+OPERATIONS = {}
+FAST_PATHS = {}
+
+
+def operator_name(operators, op_token):
+    if op_token.type in operators:
+        return operators[op_token.type]
+    return operators[op_token.type, op_token.value]
+
+
+def register_fast_path(operator, left_type, right_type, function):
+    FAST_PATHS[operator, left_type, right_type] = function
+    OPERATIONS.pop((operator, left_type, right_type), None)
+
+
+def lookup(operator, left_type, right_type):
+    key = operator, left_type, right_type
+    operation = FAST_PATHS.get(key) or getattr(left_type, operator, None) or illegal_operation
+    OPERATIONS[key] = operation
+    return operation
+
+
+def binary_operation(operator, left, right):
+    key = operator, type(left), type(right)
+    operation = OPERATIONS.get(key) or lookup(*key)
+    return operation(left, right)
+
+
+def unary_operation(operator, operand):
+    key = operator, type(operand), None
+    operation = OPERATIONS.get(key) or lookup(*key)
+    return operation(operand)
+
+
+class Operation:
+    # Carried by an operator node or instruction. Remembers the function for
+    # the operand types it saw last, which is almost always the next ones too.
+    __slots__ = ('operator', 'left_type', 'right_type', 'function')
+
+    def __init__(self, operator):
+        self.operator = operator
+        self.left_type = None
+        self.right_type = None
+        self.function = None
+
+    def resolve(self, left_type, right_type=None):
+        key = self.operator, left_type, right_type
+        self.function = OPERATIONS.get(key) or lookup(*key)
+        self.left_type = left_type
+        self.right_type = right_type
+        return self.function
+
+    def __getstate__(self):
+        return self.operator
+
+    def __setstate__(self, operator):
+        self.__init__(operator)
+
+    def __repr__(self):
+        return self.operator
+
+
+def illegal_operation(*operands):
+    raise RTError(None, None, "Illegal operation", None)
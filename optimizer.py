@@ -0,0 +1,122 @@
+from interpreter import Number, String
+from nodes import NumberNode, StringNode
+from operators import binary_operation, unary_operation
+from token_ import Token, TokenType
+
+# Folding never builds a string longer than this, the program text would
+# otherwise carry (and the cache store) whatever a dead branch multiplies up
+MAX_FOLDED_STRING = 4096
+
+
+class Optimizer:
+    def optimize(self, node):
+        method_name = f'optimize_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_optimize_method)
+        return method(node)
+
+    def no_optimize_method(self, node):
+        return node
+
+    def optimize_ListNode(self, node):
+        node.element_nodes = [self.optimize(element_node) for element_node in node.element_nodes]
+        return node
+
+    def optimize_VarAssignNode(self, node):
+        node.value_node = self.optimize(node.value_node)
+        return node
+
+    def optimize_BinOpNode(self, node):
+        node.left_node = self.optimize(node.left_node)
+        node.right_node = self.optimize(node.right_node)
+        left = self.constant(node.left_node)
+        right = self.constant(node.right_node)
+        if left is None or right is None or self.too_long(node.operation.operator, left, right):
+            return node
+        try:
+            value = binary_operation(node.operation.operator, left, right)
+        except Exception:
+            # Leave it to fail at runtime, with the usual traceback, or not
+            # at all when it is never run
+            return node
+        return self.literal(value, node)
+
+    def optimize_UnaryOpNode(self, node):
+        node.node = self.optimize(node.node)
+        operand = self.constant(node.node)
+        if operand is None:
+            return node
+        if node.operation is None:
+            return self.literal(operand, node)
+        try:
+            value = unary_operation(node.operation.operator, operand)
+        except Exception:
+            return node
+        return self.literal(value, node)
+
+    def optimize_IfNode(self, node):
+        cases = []
+        for condition, expr, should_return_null in node.cases:
+            condition = self.optimize(condition)
+            constant = self.constant(condition)
+            # A case never taken is dropped without looking inside
+            if constant is None:
+                cases.append((condition, self.optimize(expr), should_return_null))
+            elif constant.value:
+                # Always taken, so it ends the chain as its else case. The IF
+                # itself stays so errors about its value still point at it.
+                node.cases = cases
+                node.else_case = (self.optimize(expr), should_return_null)
+                return node
+        if node.else_case:
+            expr, should_return_null = node.else_case
+            node.else_case = (self.optimize(expr), should_return_null)
+        node.cases = cases
+        return node
+
+    def optimize_ForNode(self, node):
+        node.start_value_node = self.optimize(node.start_value_node)
+        node.end_value_node = self.optimize(node.end_value_node)
+        if node.step_value_node:
+            node.step_value_node = self.optimize(node.step_value_node)
+        node.body_value_node = self.optimize(node.body_value_node)
+        return node
+
+    def optimize_WhileNode(self, node):
+        node.condition_node = self.optimize(node.condition_node)
+        node.body_node = self.optimize(node.body_node)
+        return node
+
+    def optimize_CallNode(self, node):
+        node.node_to_call = self.optimize(node.node_to_call)
+        node.arg_nodes = [self.optimize(arg_node) for arg_node in node.arg_nodes]
+        return node
+
+    def optimize_FuncDefNode(self, node):
+        node.body_node = self.optimize(node.body_node)
+        return node
+
+    def too_long(self, operator, left, right):
+        # Whether the string a fold would build is over MAX_FOLDED_STRING,
+        # known before building it
+        if type(left) is not String:
+            return False
+        if operator == 'added_to' and type(right) is String:
+            return len(left.value) + len(right.value) > MAX_FOLDED_STRING
+        if operator == 'multed_by' and type(right) is Number and type(right.value) is int:
+            return len(left.value) * right.value > MAX_FOLDED_STRING
+        return False
+
+    def constant(self, node):
+        if isinstance(node, NumberNode):
+            return Number(node.token.value)
+        if isinstance(node, StringNode):
+            return String(node.token.value)
+        return None
+
+    def literal(self, value, node):
+        if isinstance(value, Number):
+            type_ = TokenType.FLOAT if isinstance(value.value, float) else TokenType.INT
+            return NumberNode(Token(type_, value.value, node.start, node.end, node.source))
+        if isinstance(value, String) and len(value.value) <= MAX_FOLDED_STRING:
+            return StringNode(Token(TokenType.STRING, value.value, node.start, node.end, node.source))
+        return node
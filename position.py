@@ -1,17 +1,110 @@
+from bisect import bisect_right
+
+
+class Source:
+    # first_line is the line the text starts on, for text read a part at a time
+    __slots__ = ('file_name', 'text', 'first_line', 'line_starts')
+
+    def __init__(self, file_name, text, first_line=0):
+        self.file_name = file_name
+        self.text = text
+        self.first_line = first_line
+        self.line_starts = None
+
+    def line_column(self, index):
+        if self.line_starts is None:
+            line_starts = [0]
+            text = self.text
+            index_ = text.find('\n')
+            while index_ >= 0:
+                line_starts.append(index_ + 1)
+                index_ = text.find('\n', index_ + 1)
+            self.line_starts = line_starts
+        line = bisect_right(self.line_starts, index) - 1
+        return self.first_line + line, index - self.line_starts[line]
+
+    def position(self, index):
+        return Position(self, index)
+
+    def end_position(self, index):
+        return EndPosition(self, index)
+
+
+class ChunkSource:
+    # Part of a larger source that was lexed on its own, offsets in it are
+    # relative to base. Moving the part only needs base to change.
+    __slots__ = ('source', 'base')
+
+    def __init__(self, source, base):
+        self.source = source
+        self.base = base
+
+    def position(self, index):
+        return Position(self.source, self.base + index)
+
+    def end_position(self, index):
+        return EndPosition(self.source, self.base + index)
+
+
 class Position:
-    def __init__(self, index, line, column, file_name, file_text):
+    __slots__ = ('source', 'index')
+
+    def __init__(self, source, index):
+        self.source = source
         self.index = index
-        self.line = line
-        self.column = column
-        self.file_name = file_name
-        self.file_text = file_text
 
-    def advance(self, current_char=None):
-        self.index += 1
-        self.column += 1
-        if current_char == '\n':
-            self.line += 1
-            self.column = 0
+    @property
+    def line(self):
+        return self.source.line_column(self.index)[0]
+
+    @property
+    def column(self):
+        return self.source.line_column(self.index)[1]
+
+    @property
+    def file_name(self):
+        return self.source.file_name
+
+    @property
+    def file_text(self):
+        return self.source.text
+
+    def copy(self):
+        return Position(self.source, self.index)
+
+
+class EndPosition(Position):
+    # An exclusive end offset sits on the line of the character before it
+    __slots__ = ()
+
+    @property
+    def line(self):
+        return self.source.line_column(self.index - 1)[0]
+
+    @property
+    def column(self):
+        return self.source.line_column(self.index - 1)[1] + 1
 
     def copy(self):
-        return Position(self.index, self.line, self.column, self.file_name, self.file_text)
+        return EndPosition(self.source, self.index)
+
+
+class Span:
+    __slots__ = ()
+
+    @property
+    def pos_start(self):
+        return self.source.position(self.start)
+
+    @property
+    def pos_end(self):
+        return self.source.end_position(self.end)
+
+
+class Location(Span):
+    __slots__ = ('source', 'start', 'end')
+
+    def __init__(self, source, start, end):
+        self.source = source
+        self.start = start
+        self.end = end
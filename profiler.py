@@ -0,0 +1,230 @@
+import json
+import signal
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from interpreter import Interpreter
+from vm import VM
+
+VISIT_CODES = {getattr(Interpreter, name).__code__ for name in dir(Interpreter) if name.startswith('visit_')}
+VM_CODE = VM.execute.__code__
+
+
+def line_of(span):
+    position = span.pos_start
+    return position.file_name, position.line + 1
+
+
+class Profiler:
+    # Attributes time to BASIC functions, by their context's display name,
+    # and to source lines. The deterministic profiler times every node the
+    # tree walker visits and counts calls. The sampling one only looks at
+    # the stack every interval seconds of CPU time, from a profiling
+    # timer, and works for the VM as well. It cannot count calls.
+    def __init__(self, sampling=False, interval=0.001):
+        self.sampling = sampling
+        self.interval = interval
+        # name -> [calls, self seconds, total seconds]
+        self.functions = {}
+        # (file name, line) -> [hits, self seconds]
+        self.lines = {}
+        # (function names, leaf line) -> self seconds
+        self.stacks = Counter()
+        self.line_keys = {}
+        self.function_stack = []
+        self.stack_key = ()
+        self.line = None
+        self.mark = None
+
+    def interpreter(self):
+        return Interpreter() if self.sampling else ProfilingInterpreter(self)
+
+    @contextmanager
+    def running(self, mode):
+        if self.sampling:
+            # Only the main thread can set signal handlers
+            if threading.current_thread() is not threading.main_thread():
+                raise ValueError("The sampling profiler can only run on the main thread")
+            previous = signal.signal(signal.SIGPROF, self.sample)
+            self.mark = time.process_time()
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+            try:
+                yield
+            finally:
+                signal.setitimer(signal.ITIMER_PROF, 0)
+                signal.signal(signal.SIGPROF, previous)
+        else:
+            if mode == 'vm':
+                raise ValueError("Only the sampling profiler can see inside the VM")
+            self.mark = time.perf_counter()
+            self.enter_function('<program>')
+            try:
+                yield
+            finally:
+                self.leave_function()
+                self.switch_line(None)
+
+    def function_stats(self, name):
+        stats = self.functions.get(name)
+        if stats is None:
+            stats = self.functions[name] = [0, 0.0, 0.0]
+        return stats
+
+    def line_stats(self, key):
+        stats = self.lines.get(key)
+        if stats is None:
+            stats = self.lines[key] = [0, 0.0]
+        return stats
+
+    # Deterministic profiling: the time since the last switch goes to the
+    # line and function stack that were current until now
+
+    def switch_line(self, line):
+        now = time.perf_counter()
+        if self.line:
+            elapsed = now - self.mark
+            self.line_stats(self.line)[1] += elapsed
+            self.stacks[self.stack_key, self.line] += elapsed
+            if self.function_stack:
+                self.function_stack[-1][2] += elapsed
+        self.mark = now
+        previous, self.line = self.line, line
+        return previous
+
+    def enter_function(self, name):
+        self.switch_line(self.line)
+        self.function_stats(name)[0] += 1
+        self.function_stack.append([name, time.perf_counter(), 0.0])
+        self.stack_key += (name,)
+
+    def leave_function(self):
+        self.switch_line(self.line)
+        name, start, self_time = self.function_stack.pop()
+        stats = self.function_stats(name)
+        stats[1] += self_time
+        # A recursive call's time is already in the outermost one
+        if all(frame[0] != name for frame in self.function_stack):
+            stats[2] += time.perf_counter() - start
+        self.stack_key = self.stack_key[:-1]
+
+    # Sampling
+
+    def sample(self, signum, frame):
+        stack = []
+        while frame:
+            code = frame.f_code
+            if code in VISIT_CODES:
+                local_vars = frame.f_locals
+                stack.append((local_vars['context'], local_vars['node']))
+            elif code is VM_CODE and 'pc' in frame.f_locals:
+                local_vars = frame.f_locals
+                stack.append((local_vars['context'], local_vars['code'].position(max(local_vars['pc'] - 1, 0))))
+                for code_, context, _, pc in reversed(local_vars['frames']):
+                    stack.append((context, code_.position(pc - 1)))
+            frame = frame.f_back
+        # The timer only fires on a clock tick, which can be well over the
+        # interval, so each sample weighs the CPU time since the last one
+        now = time.process_time()
+        elapsed, self.mark = now - self.mark, now
+        if not stack:
+            return
+
+        # Innermost first, a function's line is that of its innermost node
+        names = []
+        contexts = []
+        line = None
+        for context, span in stack:
+            if not contexts or contexts[-1] is not context:
+                contexts.append(context)
+                names.append(context.display_name)
+            if line is None and span is not None:
+                line = line_of(span)
+        names.reverse()
+
+        self.function_stats(names[-1])[1] += elapsed
+        for name in set(names):
+            self.function_stats(name)[2] += elapsed
+        if line:
+            stats = self.line_stats(line)
+            stats[0] += 1
+            stats[1] += elapsed
+        self.stacks[tuple(names), line] += elapsed
+
+    def as_dict(self):
+        return {
+            'sampling': self.sampling,
+            'functions': [
+                {'name': name, 'calls': None if self.sampling else calls, 'self': self_time, 'total': total}
+                for name, (calls, self_time, total) in sorted(self.functions.items(), key=lambda item: -item[1][1])
+            ],
+            'lines': [
+                {'file': file_name, 'line': line, 'hits': hits, 'self': self_time}
+                for (file_name, line), (hits, self_time) in sorted(self.lines.items(), key=lambda item: -item[1][1])
+            ],
+        }
+
+    def to_json(self, indent=None):
+        return json.dumps(self.as_dict(), indent=indent)
+
+    def collapsed(self):
+        # One "frame;frame;...;file:line weight" line per stack, for
+        # flamegraph.pl and compatible tools. Weights are microseconds.
+        result = []
+        for (names, line), seconds in sorted(self.stacks.items(), key=lambda item: item[0][0]):
+            frames = list(names)
+            if line:
+                frames.append(f'{line[0]}:{line[1]}')
+            weight = round(seconds * 1000000)
+            if weight:
+                result.append(f'{";".join(frames)} {weight}')
+        return '\n'.join(result)
+
+    def report(self, limit=10):
+        result = f'{"function":<24}{"calls":>10}{"self s":>12}{"total s":>12}\n'
+        for name, (calls, self_time, total) in sorted(self.functions.items(), key=lambda item: -item[1][1])[:limit]:
+            calls = '-' if self.sampling else calls
+            result += f'{name:<24}{calls:>10}{self_time:>12.4f}{total:>12.4f}\n'
+        result += f'\n{"line":<24}{"hits":>10}{"self s":>12}\n'
+        for (file_name, line), (hits, self_time) in sorted(self.lines.items(), key=lambda item: -item[1][1])[:limit]:
+            result += f'{f"{file_name}:{line}":<24}{hits:>10}{self_time:>12.4f}\n'
+        return result
+
+
+class ProfilingInterpreter(Interpreter):
+    # Visitors that move the profiler to the line of the node they visit
+    # and back, and calls that tell it which function is running
+    __slots__ = ('visitors', 'profiler')
+
+    def __init__(self, profiler):
+        self.visitors = {}
+        self.profiler = profiler
+
+    def add_visitor(self, node_type):
+        visit = Interpreter.visitors.get(node_type) or Interpreter.add_visitor(self, node_type)
+        profiler = self.profiler
+        line_keys = profiler.line_keys
+
+        def profiled_visit(interpreter, node, context):
+            line = line_keys.get(node)
+            if line is None:
+                line = line_keys[node] = line_of(node)
+            if line == profiler.line:
+                return visit(interpreter, node, context)
+            previous = profiler.switch_line(line)
+            profiler.line_stats(line)[0] += 1
+            try:
+                return visit(interpreter, node, context)
+            finally:
+                profiler.switch_line(previous)
+
+        self.visitors[node_type] = profiled_visit
+        return profiled_visit
+
+    def call(self, function, args, context, call_span):
+        self.profiler.enter_function(function.name)
+        try:
+            return Interpreter.call(self, function, args, context, call_span)
+        finally:
+            self.profiler.leave_function()
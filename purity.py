@@ -0,0 +1,80 @@
+from nodes import VarAccessNode
+
+# Globals a pure function may read or call, they only look at their arguments
+PURE_NAMES = {"null", "TRUE", "FALSE", "IS_NUM", "IS_STR", "IS_LIST", "IS_FUN"}
+
+
+def is_pure(name, arg_names, body_node):
+    return Purity(name).check(body_node, set(arg_names))
+
+
+class Purity:
+    # Conservative: a function is pure when its result depends on nothing but
+    # its arguments and calling it changes nothing. Names are looked up in
+    # the callers' tables, so reading anything the function did not bind
+    # itself is already impure, and the only calls allowed are to the pure
+    # builtins and to the function itself.
+    def __init__(self, name):
+        self.name = name
+
+    def check(self, node, bound):
+        method_name = f'check_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_check_method)
+        return method(node, bound)
+
+    def no_check_method(self, node, bound):
+        return False
+
+    def check_NumberNode(self, node, bound):
+        return True
+
+    def check_StringNode(self, node, bound):
+        return True
+
+    def check_ListNode(self, node, bound):
+        return all(self.check(element_node, bound) for element_node in node.element_nodes)
+
+    def check_VarAccessNode(self, node, bound):
+        name = node.var_name_token.value
+        return name in bound or name in PURE_NAMES
+
+    def check_VarAssignNode(self, node, bound):
+        # Assignments bind in the function's own table
+        if not self.check(node.value_node, bound):
+            return False
+        bound.add(node.var_name_token.value)
+        return True
+
+    def check_BinOpNode(self, node, bound):
+        return self.check(node.left_node, bound) and self.check(node.right_node, bound)
+
+    def check_UnaryOpNode(self, node, bound):
+        return self.check(node.node, bound)
+
+    def check_IfNode(self, node, bound):
+        # Names bound in a branch may be unbound after the IF
+        for i, (condition, expr, _) in enumerate(node.cases):
+            if not self.check(condition, bound if i == 0 else set(bound)):
+                return False
+            if not self.check(expr, set(bound)):
+                return False
+        return not node.else_case or self.check(node.else_case[0], set(bound))
+
+    def check_ForNode(self, node, bound):
+        for value_node in (node.start_value_node, node.end_value_node, node.step_value_node):
+            if value_node and not self.check(value_node, bound):
+                return False
+        # The loop variable is removed again once the loop ends
+        return self.check(node.body_value_node, bound | {node.var_name_tok.value})
+
+    def check_WhileNode(self, node, bound):
+        return self.check(node.condition_node, bound) and self.check(node.body_node, set(bound))
+
+    def check_CallNode(self, node, bound):
+        node_to_call = node.node_to_call
+        if not isinstance(node_to_call, VarAccessNode):
+            return False
+        name = node_to_call.var_name_token.value
+        if name in bound or (name != self.name and name not in PURE_NAMES):
+            return False
+        return all(self.check(arg_node, bound) for arg_node in node.arg_nodes)
@@ -0,0 +1,86 @@
+from nodes import ListNode, VarAssignNode, BinOpNode, UnaryOpNode, IfNode, ForNode, WhileNode, CallNode, FuncDefNode
+
+LOCAL = 0
+GLOBAL = 1
+DYNAMIC = 2
+
+
+class Scope:
+    def __init__(self, arg_names):
+        self.local_index = {}
+        for arg_name in arg_names:
+            self.declare(arg_name)
+
+    def declare(self, name):
+        if name not in self.local_index:
+            self.local_index[name] = len(self.local_index)
+
+
+class Resolver:
+    # Functions see their callers' variables (scoping is dynamic), so a free
+    # name can only be bound straight to a global slot when no function in
+    # the program declares a local of the same name. When only part of the
+    # program is known, no free name in a function can be. Programs run
+    # later against the same globals can add such locals, the VM checks
+    # for them when it links code to the globals.
+    def resolve(self, node, whole_program=True):
+        self.whole_program = whole_program
+        self.scopes = {}
+        self.visit(node, None)
+        self.function_locals = set()
+        for scope in self.scopes.values():
+            self.function_locals.update(scope.local_index)
+        return self
+
+    def scope_of(self, func_def_node):
+        return self.scopes[func_def_node]
+
+    def lookup(self, name, scope):
+        if scope is None:
+            return GLOBAL
+        if name in scope.local_index:
+            return LOCAL
+        if name in self.function_locals or not self.whole_program:
+            return DYNAMIC
+        return GLOBAL
+
+    def visit(self, node, scope):
+        if isinstance(node, VarAssignNode):
+            if scope:
+                scope.declare(node.var_name_token.value)
+            self.visit(node.value_node, scope)
+        elif isinstance(node, BinOpNode):
+            self.visit(node.left_node, scope)
+            self.visit(node.right_node, scope)
+        elif isinstance(node, UnaryOpNode):
+            self.visit(node.node, scope)
+        elif isinstance(node, ListNode):
+            for element_node in node.element_nodes:
+                self.visit(element_node, scope)
+        elif isinstance(node, IfNode):
+            for condition, expr, _ in node.cases:
+                self.visit(condition, scope)
+                self.visit(expr, scope)
+            if node.else_case:
+                self.visit(node.else_case[0], scope)
+        elif isinstance(node, ForNode):
+            if scope:
+                scope.declare(node.var_name_tok.value)
+            self.visit(node.start_value_node, scope)
+            self.visit(node.end_value_node, scope)
+            if node.step_value_node:
+                self.visit(node.step_value_node, scope)
+            self.visit(node.body_value_node, scope)
+        elif isinstance(node, WhileNode):
+            self.visit(node.condition_node, scope)
+            self.visit(node.body_node, scope)
+        elif isinstance(node, CallNode):
+            self.visit(node.node_to_call, scope)
+            for arg_node in node.arg_nodes:
+                self.visit(arg_node, scope)
+        elif isinstance(node, FuncDefNode):
+            if scope and node.var_name_tok:
+                scope.declare(node.var_name_tok.value)
+            func_scope = Scope([arg_name.value for arg_name in node.arg_name_toks])
+            self.scopes[node] = func_scope
+            self.visit(node.body_node, func_scope)
@@ -1,15 +1,21 @@
+import sys
 
 import basic
+from profiler import Profiler
 
 if __name__ == "__main__":
+    # --profile times every node, --sample only samples the stack
+    profile = '--profile' in sys.argv[1:]
+    sample = '--sample' in sys.argv[1:]
     while True:
         text = input("basic > ")
         if text.strip() == "": continue
-        result, error = basic.run("<stdin>", text)
+        profiler = Profiler(sampling=sample) if profile or sample else None
+        result, error = basic.run("<stdin>", text, profiler=profiler)
         if error: print(error.as_string())
         elif result:
-            if len(result.elements) == 1:
-                print(repr(result.elements[0]))
+            if result.size == 1:
+                print(repr(result.get(0)))
             else:
                 print(repr(result))
-
+        if profiler: print(profiler.report())
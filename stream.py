@@ -0,0 +1,94 @@
+import sys
+from itertools import islice
+
+from basic import global_symbol_table
+from compiler import Compiler
+from error import Error, InvalidSyntaxError
+from interpreter import Context, Interpreter
+from lexer import StreamScanner
+from optimizer import Optimizer
+from parser import Parser
+from token_ import TokenType
+from vm import VM, MAX_DEPTH
+
+
+class StreamParser(Parser):
+    # Pulls tokens from the lexer only when it gets to them, and forgets
+    # the ones before the statement it is on
+    def __init__(self, scanner):
+        self.scanner = scanner
+        self.stream = scanner.tokens()
+        super().__init__([])
+
+    def update_current_tok(self):
+        missing = self.token_index - len(self.tokens) + 1
+        if missing > 0:
+            self.tokens.extend(islice(self.stream, missing))
+        super().update_current_tok()
+
+    def forget(self):
+        del self.tokens[:self.token_index]
+        self.token_index = 0
+
+    def each_statement(self):
+        # The top level of Parser.statements, giving each statement as soon
+        # as it is parsed. A statement after the first that does not parse is
+        # reported where it starts, like parse() does.
+        while self.current_token.type == TokenType.NEWLINE:
+            self.advance()
+        yield self.next_statement()
+        while True:
+            newline_count = 0
+            while self.current_token.type == TokenType.NEWLINE:
+                self.advance()
+                newline_count += 1
+            if self.current_token.type == TokenType.EOF:
+                return
+            token = self.current_token
+            if not newline_count:
+                raise InvalidSyntaxError(token.pos_start, token.pos_end, "Expected +-*/")
+            try:
+                statement = self.next_statement()
+            except InvalidSyntaxError:
+                raise InvalidSyntaxError(token.pos_start, token.pos_end, "Expected +-*/")
+            yield statement
+
+    def next_statement(self):
+        self.forget()
+        statement = self.expr()
+        self.scanner.start_source()
+        return statement
+
+
+def run(filename, lines, mode='interpret', optimize=1, max_depth=MAX_DEPTH):
+    # Runs each top level statement once it has been read, so statements
+    # before a syntax error have already run when it is reported
+    context = Context('<program>')
+    context.symbol_table = global_symbol_table
+    vm = VM(max_depth=max_depth)
+    interpreter = Interpreter()
+    result = None
+    try:
+        parser = StreamParser(StreamScanner(filename, lines))
+        for statement in parser.each_statement():
+            if optimize:
+                statement = Optimizer().optimize(statement)
+            if mode == 'vm':
+                # Functions may be called from statements not read yet
+                result = vm.run(Compiler().compile(statement, whole_program=False), context)
+            else:
+                result = interpreter.interpret(statement, context)
+    except Error as error:
+        return None, error
+    return result, None
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        with open(sys.argv[1]) as file:
+            result, error = run(sys.argv[1], file)
+    else:
+        result, error = run("<stdin>", sys.stdin)
+    if error:
+        print(error.as_string())
+        sys.exit(1)
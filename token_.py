@@ -1,5 +1,7 @@
 from enum import Enum
 
+from position import Span
+
 
 class TokenType(Enum):
     INT = 0
@@ -29,16 +31,16 @@ class TokenType(Enum):
     SEMICOLON = 24
 
 
-class Token:
-    def __init__(self, type, value=None, pos_start=None, pos_end=None):
+class Token(Span):
+    __slots__ = ('type', 'value', 'start', 'end', 'source')
+
+    def __init__(self, type, value=None, start=None, end=None, source=None):
         self.type = type
         self.value = value
-        if pos_start:
-            self.pos_start = pos_start.copy()
-            self.pos_end = pos_start.copy()
-            self.pos_end.advance()
-        if pos_end:
-            self.pos_end = pos_end
+        self.start = start
+        self.end = start + 1 if end is None and start is not None else end
+        self.source = source
+
     def matches(self, type_, value):
         return self.type == type_ and self.value == value
 
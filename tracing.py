@@ -0,0 +1,80 @@
+import json
+import time
+from contextlib import contextmanager, nullcontext
+
+from interpreter import Interpreter
+from nodes import count_nodes
+
+
+class Tracer:
+    # Collects what a run did, one part per flag: how long each phase took,
+    # how many tokens and nodes it made and how often the tree walker visited
+    # each node type, which a run in vm mode rejects. A run without a tracer
+    # does none of this.
+    def __init__(self, phases=True, counts=True, visits=False):
+        self.phases = phases
+        self.counts = counts
+        self.visits = visits
+        self.timings = {}
+        self.token_count = None
+        self.node_count = None
+        self.visit_counts = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, tokens, ast):
+        if self.counts:
+            self.token_count = len(tokens)
+            self.node_count = count_nodes(ast)
+
+    def interpreter(self):
+        return TracingInterpreter(self.visit_counts) if self.visits else Interpreter()
+
+    def as_dict(self):
+        result = {}
+        if self.phases:
+            result['phases'] = dict(self.timings)
+        if self.counts:
+            result['tokens'] = self.token_count
+            result['nodes'] = self.node_count
+        if self.visits:
+            result['visits'] = dict(sorted(self.visit_counts.items(), key=lambda item: -item[1]))
+        return result
+
+    def to_json(self, indent=None):
+        return json.dumps(self.as_dict(), indent=indent)
+
+
+def phase(tracer, name):
+    if tracer and tracer.phases:
+        return tracer.phase(name)
+    return nullcontext()
+
+
+class TracingInterpreter(Interpreter):
+    # Has its own visitors, each counting before it visits
+    __slots__ = ('visitors', 'visit_counts')
+
+    def __init__(self, visit_counts):
+        self.visitors = {}
+        self.visit_counts = visit_counts
+
+    def add_visitor(self, node_type):
+        visit = Interpreter.visitors.get(node_type) or Interpreter.add_visitor(self, node_type)
+        name = node_type.__name__
+        visit_counts = self.visit_counts
+        visit_counts.setdefault(name, 0)
+
+        def counted_visit(interpreter, node, context):
+            visit_counts[name] += 1
+            return visit(interpreter, node, context)
+
+        self.visitors[node_type] = counted_visit
+        return counted_visit
+
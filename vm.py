@@ -0,0 +1,220 @@
+from compiler import LOAD_CONST, LOAD_NULL, LOAD_NAME, LOAD_FAST, STORE_FAST, DELETE_FAST, LOAD_GLOBAL, STORE_GLOBAL, \
+    DELETE_GLOBAL, BINARY_OP, UNARY_OP, POP_TOP, DUP_TOP, JUMP, POP_JUMP_IF_FALSE, BUILD_LIST, NEW_ACC, \
+    ACC_APPEND, FOR_RANGE, FOR_ITER, MAKE_FUNCTION, CALL, RETURN, TAIL_CALL
+from budget import active
+from error import RTError
+from interpreter import Number, ListValue, Function, Context, number
+
+
+class CompiledFunction(Function):
+    __slots__ = ('code',)
+
+    def __init__(self, code):
+        super().__init__(code.name, None, code.arg_names, code.should_return_null)
+        self.code = code
+
+    def execute(self, args, context, call_span):
+        self.check_args(self.arg_names, args, context, call_span)
+        try:
+            return VM().call(self, args, context, call_span)
+        except RecursionError:
+            # Only calls from outside a VM nest Python calls, through MEMO say
+            raise RTError(call_span.pos_start, call_span.pos_end, "Maximum recursion depth exceeded", context)
+
+    def is_pure(self):
+        return self.code.pure
+
+
+# Calls between compiled functions nest this deep at most
+MAX_DEPTH = 10000
+
+
+class VM:
+    __slots__ = ('global_symbol_table', 'max_depth')
+
+    def __init__(self, global_symbol_table=None, max_depth=MAX_DEPTH):
+        self.global_symbol_table = global_symbol_table
+        self.max_depth = max_depth
+
+    def run(self, code, context):
+        self.global_symbol_table = context.symbol_table
+        if code.function_locals:
+            self.global_symbol_table.add_function_locals(code.function_locals)
+        return self.execute(code, context)
+
+    def call(self, function, args, context, call_span):
+        if self.global_symbol_table is None:
+            root = context
+            while root.parent:
+                root = root.parent
+            self.global_symbol_table = root.symbol_table
+        exec_context = self.enter(function, args, context, call_span)
+        value = self.execute(function.code, exec_context)
+        exec_context.release()
+        return value
+
+    def enter(self, function, args, context, call_span):
+        local_index = function.code.local_index
+        slots = [None] * len(local_index)
+        slots[:len(args)] = args
+        return Context.enter(function.name, context, call_span, local_index, slots)
+
+    def execute(self, code, context):
+        # Calls between compiled functions push a frame here instead of
+        # recursing, the context execute was given belongs to its caller
+        entry_context = context
+        frames = []
+        global_slots = self.global_symbol_table.slots
+        budget = active.budget
+        stack = []
+        pc = 0
+        while True:
+            ops = code.ops
+            args = code.args
+            symbol_table = context.symbol_table
+            slots = symbol_table.slots
+            links = code.link(self.global_symbol_table)
+            push = stack.append
+            pop = stack.pop
+            while True:
+                op = ops[pc]
+                arg = args[pc]
+                pc += 1
+                if op == LOAD_FAST:
+                    value = slots[arg[0]]
+                    if value is None:
+                        value = symbol_table.get(arg[1])
+                        if value is None:
+                            raise self.name_error(arg[1], code, pc - 1, context)
+                    push(value)
+                elif op == LOAD_GLOBAL:
+                    index = links[arg[0]]
+                    value = None if index is None else global_slots[index]
+                    if value is None:
+                        # Not set globally, or a caller's local may hide it
+                        value = symbol_table.get(arg[1])
+                        if value is None:
+                            raise self.name_error(arg[1], code, pc - 1, context)
+                    push(value)
+                elif op == LOAD_NAME:
+                    value = symbol_table.get(arg)
+                    if value is None:
+                        raise self.name_error(arg, code, pc - 1, context)
+                    push(value)
+                elif op == LOAD_CONST:
+                    push(arg)
+                elif op == BINARY_OP:
+                    right = pop()
+                    left = stack[-1]
+                    if type(left) is arg.left_type and type(right) is arg.right_type:
+                        function = arg.function
+                    else:
+                        function = arg.resolve(type(left), type(right))
+                    try:
+                        stack[-1] = function(left, right)
+                    except RTError as error:
+                        raise self.locate(error, code, pc - 1, context)
+                elif op == FOR_ITER:
+                    x = next(stack[-1], None)
+                    if x is None:
+                        pop()
+                        pc = arg[0]
+                    elif arg[1] == STORE_FAST:
+                        slots[arg[2]] = number(x)
+                    else:
+                        global_slots[links[arg[2]]] = number(x)
+                elif op == JUMP:
+                    # Loops jump back, a budget pays for the instructions again
+                    if budget and arg < pc:
+                        budget.charge(pc - arg, code.position(pc - 1), context)
+                    pc = arg
+                elif op == POP_JUMP_IF_FALSE:
+                    if not pop().value:
+                        pc = arg
+                elif op == POP_TOP:
+                    pop()
+                elif op == CALL or op == TAIL_CALL:
+                    call_args = stack[-arg:] if arg else []
+                    del stack[len(stack) - arg:]
+                    function = stack[-1]
+                    call_span = code.position(pc - 1)
+                    if type(function) is CompiledFunction and len(call_args) == len(function.arg_names):
+                        if budget:
+                            budget.charge(len(function.code.ops), call_span, context)
+                        if op == TAIL_CALL and function.code.can_replace(code):
+                            # Nothing is left to do in this frame, the callee
+                            # returns straight to our caller
+                            caller, call_span = context.parent, context.parent_entry_span
+                            if context is not entry_context:
+                                context.release()
+                            context = self.enter(function, call_args, caller, call_span)
+                        else:
+                            if len(frames) >= self.max_depth:
+                                raise self.depth_error(call_span, context)
+                            frames.append((code, context, stack, pc))
+                            context = self.enter(function, call_args, context, call_span)
+                        code = function.code
+                        stack = []
+                        pc = 0
+                        break
+                    stack[-1] = function.execute(call_args, context, call_span)
+                elif op == STORE_FAST:
+                    slots[arg] = pop()
+                elif op == STORE_GLOBAL:
+                    global_slots[links[arg]] = pop()
+                elif op == ACC_APPEND:
+                    value = pop()
+                    stack[-arg].append(value)
+                elif op == DUP_TOP:
+                    push(stack[-1])
+                elif op == LOAD_NULL:
+                    push(Number.null)
+                elif op == UNARY_OP:
+                    operand = stack[-1]
+                    if type(operand) is arg.left_type:
+                        function = arg.function
+                    else:
+                        function = arg.resolve(type(operand))
+                    try:
+                        stack[-1] = function(operand)
+                    except RTError as error:
+                        raise self.locate(error, code, pc - 1, context)
+                elif op == BUILD_LIST:
+                    elements = stack[-arg:] if arg else []
+                    del stack[len(stack) - arg:]
+                    push(ListValue(elements))
+                elif op == NEW_ACC:
+                    push(ListValue([]))
+                elif op == FOR_RANGE:
+                    step = pop()
+                    end = pop()
+                    start = pop()
+                    push(iter(range(start.value, end.value, step.value)))
+                elif op == DELETE_FAST:
+                    slots[arg] = None
+                elif op == DELETE_GLOBAL:
+                    global_slots[links[arg]] = None
+                elif op == MAKE_FUNCTION:
+                    push(CompiledFunction(arg))
+                elif op == RETURN:
+                    value = pop()
+                    if context is not entry_context:
+                        context.release()
+                    if not frames:
+                        return value
+                    code, context, stack, pc = frames.pop()
+                    stack[-1] = value
+                    break
+                else:
+                    raise Exception(f'Unknown opcode {op}')
+
+    def depth_error(self, call_span, context):
+        return RTError(call_span.pos_start, call_span.pos_end, "Maximum recursion depth exceeded", context)
+
+    def name_error(self, name, code, index, context):
+        span = code.position(index)
+        return RTError(span.pos_start, span.pos_end, f"'{name}' is not defined", context)
+
+    def locate(self, error, code, index, context):
+        span = code.position(index)
+        return error.set_pos(span.pos_start, span.pos_end).set_context(context)